@@ -0,0 +1,350 @@
+"""
+Параллельный запуск тестов YaNews и YaNote.
+
+    python run_tests_parallel.py [--workers N] [--benchmarks]
+
+Делает то же, что run_tests.sh, и с теми же кодами выхода: flake8,
+structure_test.py, затем тесты обоих проектов. С --benchmarks после
+тестов по очереди запускается benchmarks.routes --check каждого
+проекта: регрессия относительно эталона тоже роняет сборку. Проекты тестируются
+одновременно, а тесты каждого проекта делятся между N процессами
+pytest. У каждого процесса своя тестовая база SQLite в памяти.
+Шарды балансируются по длительности тестов из прошлых запусков,
+которая хранится в .test_durations.json.
+
+Этот же модуль подключается к pytest как плагин (-p run_tests_parallel)
+и записывает результаты шарда в файл из переменной SHARD_REPORT.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DURATIONS_FILE = BASE_DIR / '.test_durations.json'
+# Оценка для тестов, которых ещё нет в .test_durations.json.
+DEFAULT_DURATION = 0.1
+REPORT_ENV = 'SHARD_REPORT'
+# Код выхода pytest, если не собрано ни одного теста.
+NO_TESTS_COLLECTED = 5
+
+
+@dataclass
+class Project:
+    name: str
+    directory: str
+    settings: str
+    failure_message: str
+
+    @property
+    def benchmark_message(self):
+        return (
+            f' Адреса проекта {self.name} стали медленнее эталона '
+            f'{self.directory}/benchmarks/routes_baseline.json '
+        )
+
+
+PROJECTS = (
+    Project(
+        'ya_news', 'ya_news', 'yanews.settings',
+        ' При запуске упали ваши тесты для проекта YaNews. '
+        'Проверьте тесты этого проекта ',
+    ),
+    Project(
+        'ya_note', 'ya_note', 'yanote.settings',
+        ' При запуске упали ваши тесты для проекта YaNote. '
+        'Проверьте тесты этого проекта ',
+    ),
+)
+
+
+# Плагин pytest: результаты тестов шарда.
+
+_results = {}
+
+
+def pytest_runtest_logreport(report):
+    if not os.environ.get(REPORT_ENV):
+        return
+    result = _results.setdefault(
+        report.nodeid, {'outcome': 'passed', 'duration': 0.0}
+    )
+    result['duration'] += report.duration
+    if report.failed:
+        # Падение в setup или teardown pytest считает ошибкой.
+        result['outcome'] = 'failed' if report.when == 'call' else 'error'
+        result['message'] = report.longreprtext.strip().splitlines()[-1:]
+    elif report.skipped and result['outcome'] == 'passed':
+        result['outcome'] = 'skipped'
+
+
+def pytest_sessionfinish(session):
+    path = os.environ.get(REPORT_ENV)
+    if path:
+        Path(path).write_text(json.dumps(_results), encoding='utf-8')
+
+
+# Оркестратор.
+
+@dataclass
+class Shard:
+    project: Project
+    tests: list = field(default_factory=list)
+    estimate: float = 0.0
+    process: subprocess.Popen = None
+    report_path: str = None
+    log: object = None
+    output: str = ''
+    status: int = None
+    results: dict = field(default_factory=dict)
+
+
+def print_message(message, symbol, error=False):
+    """Строка на всю ширину терминала, как print_message в run_tests.sh."""
+    width = shutil.get_terminal_size().columns
+    color = '\033[0;31m' if error else '\033[0;32m'
+    print(f'{color}\n{message.center(width, symbol)}\033[0m')
+
+
+def project_env(project):
+    env = dict(os.environ)
+    # Свои настройки проекта можно задать в DJANGO_SETTINGS_MODULE,
+    # настройки другого проекта заменяются настройками по умолчанию.
+    package = project.settings.split('.')[0]
+    if env.get('DJANGO_SETTINGS_MODULE', '').split('.')[0] != package:
+        env['DJANGO_SETTINGS_MODULE'] = project.settings
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (str(BASE_DIR), env.get('PYTHONPATH')))
+    )
+    return env
+
+
+def collect(project):
+    """Идентификаторы тестов проекта и код выхода сбора."""
+    completed = subprocess.run(
+        # addopts в pytest.ini включает -vv, а нужен список без дерева.
+        [sys.executable, '-m', 'pytest', '--collect-only', '-q',
+         '-o', 'addopts=-p no:cacheprovider'],
+        cwd=BASE_DIR / project.directory, env=project_env(project),
+        capture_output=True, text=True,
+    )
+    tests = [
+        line for line in completed.stdout.splitlines() if '::' in line
+    ]
+    if completed.returncode:
+        sys.stderr.write(completed.stdout + completed.stderr)
+    return tests, completed.returncode
+
+
+def load_durations():
+    try:
+        return json.loads(DURATIONS_FILE.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def make_shards(project, tests, durations, workers):
+    """
+    Делит тесты на шарды жадно: самый долгий из оставшихся тестов
+    уходит в шард с наименьшей суммарной длительностью.
+    """
+    known = durations.get(project.name, {})
+    default = statistics.median(known.values()) if known else (
+        DEFAULT_DURATION
+    )
+    shards = [Shard(project) for _ in range(min(workers, len(tests)))]
+    for test in sorted(tests, key=lambda test: -known.get(test, default)):
+        shard = min(shards, key=lambda shard: shard.estimate)
+        shard.tests.append(test)
+        shard.estimate += known.get(test, default)
+    return shards
+
+
+def start(shard, report_path, log_path):
+    shard.report_path = report_path
+    env = project_env(shard.project)
+    env[REPORT_ENV] = shard.report_path
+    # Вывод шарда идёт в файл, а не в канал: заполненный канал
+    # остановил бы шард, пока оркестратор ждёт другие.
+    shard.log = open(log_path, 'w+', encoding='utf-8')
+    shard.process = subprocess.Popen(
+        [sys.executable, '-m', 'pytest', '--tb=line', '-q',
+         '-p', 'run_tests_parallel', *shard.tests],
+        cwd=BASE_DIR / shard.project.directory, env=env,
+        stdout=shard.log, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def finish(shard):
+    shard.status = shard.process.wait()
+    with shard.log:
+        shard.log.seek(0)
+        shard.output = shard.log.read()
+    try:
+        shard.results = json.loads(
+            Path(shard.report_path).read_text(encoding='utf-8')
+        )
+    except FileNotFoundError:
+        shard.results = {}
+
+
+def merged_status(statuses):
+    """Наименьший ненулевой код: 1 (упали тесты) важнее прочих."""
+    failed = [status for status in statuses if status]
+    return min(failed) if failed else 0
+
+
+def report(project, shards, status, seconds):
+    results = {}
+    for shard in shards:
+        results.update(shard.results)
+    outcomes = {}
+    for result in results.values():
+        outcomes[result['outcome']] = outcomes.get(result['outcome'], 0) + 1
+    summary = ', '.join(
+        f'{count} {outcome}' for outcome, count in sorted(outcomes.items())
+    ) or 'нет результатов'
+    print(
+        f'{project.name}: {summary} за {seconds:.1f} с, '
+        f'шардов: {len(shards)}', file=sys.stderr,
+    )
+    for nodeid, result in sorted(results.items()):
+        if result['outcome'] in ('failed', 'error'):
+            message = ' '.join(result.get('message', []))
+            print(f'  {result["outcome"].upper()} {nodeid}: {message}',
+                  file=sys.stderr)
+    if status and not results:
+        # Шард упал до запуска тестов: покажем его вывод целиком.
+        for shard in shards:
+            if shard.status:
+                sys.stderr.write(shard.output)
+
+
+def save_durations(durations, project, shards):
+    """Обновляет длительности; удалённые тесты из файла пропадают."""
+    known = durations.get(project.name, {})
+    results = {}
+    for shard in shards:
+        results.update(shard.results)
+    durations[project.name] = {
+        test: round(results[test]['duration'], 4)
+        if test in results else known[test]
+        for shard in shards for test in shard.tests
+        if test in results or test in known
+    }
+
+
+def run_projects(workers):
+    """Тесты обоих проектов одновременно; коды выхода по проектам."""
+    durations = load_durations()
+    statuses = {}
+    shards = {}
+    started = time.perf_counter()
+    for project in PROJECTS:
+        tests, status = collect(project)
+        if not status and not tests:
+            # Как pytest в run_tests.sh: пустой прогон — не успех.
+            status = NO_TESTS_COLLECTED
+        if status:
+            statuses[project.name] = status
+            continue
+        shards[project.name] = make_shards(
+            project, tests, durations, workers
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, project_shards in shards.items():
+            for index, shard in enumerate(project_shards):
+                path = os.path.join(tmp, f'{name}-{index}')
+                start(shard, f'{path}.json', f'{path}.log')
+        for project in PROJECTS:
+            if project.name not in shards:
+                continue
+            for shard in shards[project.name]:
+                finish(shard)
+            status = merged_status(
+                shard.status for shard in shards[project.name]
+            )
+            statuses[project.name] = status
+            report(
+                project, shards[project.name], status,
+                time.perf_counter() - started,
+            )
+            save_durations(durations, project, shards[project.name])
+    DURATIONS_FILE.write_text(
+        json.dumps(durations, ensure_ascii=False, indent=1, sort_keys=True),
+        encoding='utf-8',
+    )
+    return statuses
+
+
+def run_benchmarks():
+    """
+    Сравнение адресов с эталоном, проекты по очереди: одновременный
+    запуск исказил бы задержки.
+    """
+    for project in PROJECTS:
+        status = subprocess.call(
+            [sys.executable, '-m', 'benchmarks.routes', '--check'],
+            cwd=BASE_DIR / project.directory, env=project_env(project),
+            stdout=sys.stderr,
+        )
+        if status:
+            print_message(project.benchmark_message, '=', error=True)
+            return status
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+        help='процессов pytest на проект',
+    )
+    parser.add_argument(
+        '--benchmarks', action='store_true',
+        help='сравнить задержки адресов с эталоном после тестов',
+    )
+    args = parser.parse_args()
+
+    status = subprocess.call(
+        [sys.executable, '-m', 'flake8', '--config=setup.cfg'],
+        cwd=BASE_DIR, stdout=sys.stderr,
+    )
+    if status:
+        print_message(
+            ' flake8 обнаружил отклонения от стандартов, приведите код '
+            'в соответствие с PEP8 ', '=', error=True,
+        )
+        return status
+    print_message(
+        ' flake8 завершил проверку кода, ошибок не обнаружено ', '='
+    )
+    status = subprocess.call(
+        [sys.executable, 'structure_test.py'], cwd=BASE_DIR
+    )
+    if status:
+        print_message(
+            ' Убедитесь, что написанные вами тесты скопированы в указанные '
+            'в ТЗ директории ', '=', error=True,
+        )
+        return status
+    statuses = run_projects(args.workers)
+    # Как в run_tests.sh: сначала сообщаем о YaNews, потом о YaNote.
+    for project in PROJECTS:
+        if statuses[project.name]:
+            print_message(project.failure_message, '=', error=True)
+            return statuses[project.name]
+    if args.benchmarks:
+        return run_benchmarks()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
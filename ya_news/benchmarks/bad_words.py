@@ -0,0 +1,64 @@
+"""
+Сравнение проверки запрещённых слов: цикл по списку и автомат.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bad_words --words 5000 --text-length 2000
+"""
+import argparse
+import random
+import timeit
+
+from news.moderation import AhoCorasick, normalize
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def loop_search(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--text-length', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [random_word(rng, rng.randint(6, 12)) for _ in range(args.words)]
+    # Чистый текст — худший случай: проверяются все слова целиком.
+    text = ' '.join(
+        random_word(rng, rng.randint(2, 8))
+        for _ in range(args.text_length // 5)
+    )[:args.text_length]
+
+    build = timeit.timeit(lambda: AhoCorasick(words), number=1)
+    matcher = AhoCorasick(words)
+    assert matcher.search(normalize(text)) == loop_search(words, text)
+
+    loop_time = timeit.timeit(
+        lambda: loop_search(words, text), number=args.repeat
+    ) / args.repeat
+    matcher_time = timeit.timeit(
+        lambda: matcher.search(normalize(text)), number=args.repeat
+    ) / args.repeat
+
+    print(f'Слов: {args.words}, длина текста: {len(text)}')
+    print(f'Построение автомата: {build * 1000:.1f} мс')
+    print(f'Цикл по списку:      {loop_time * 1000:.3f} мс на текст')
+    print(f'Автомат:             {matcher_time * 1000:.3f} мс на текст')
+    print(f'Ускорение:           {loop_time / matcher_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
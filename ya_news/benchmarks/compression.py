@@ -0,0 +1,106 @@
+"""
+Время сжатия и размер страниц YaNews при разных кодировках и уровнях.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.compression --comments 2000 --repeats 20
+
+Страницы рендерятся настоящими шаблонами на временной базе: главная
+и страница новости с comments комментариями, обычная и потоковая.
+Потоковая сжимается по частям, как это делает CompressionMiddleware,
+с досылкой данных после каждой части.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import django
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 5, 9, 11)}
+
+
+def render_pages(path, comments):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from news.models import Comment, News
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости ' * 20)
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    )
+    news = News.objects.first()
+    author = get_user_model().objects.create(username='Комментатор')
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author,
+                text=f'Комментарий номер {index} к новости')
+        for index in range(comments)
+    )
+    client = Client()
+    detail = reverse('news:detail', args=(news.pk,))
+    pages = {
+        'home': [client.get(reverse('news:home')).content],
+        'detail': [client.get(detail).content],
+    }
+    settings.NEWS_DETAIL_STREAMING = True
+    pages['detail stream'] = list(client.get(detail).streaming_content)
+    settings.NEWS_DETAIL_STREAMING = False
+    return pages
+
+
+def compress(encoder_class, chunks):
+    from yacommon.middleware import compress_stream
+
+    if len(chunks) == 1:
+        encoder = encoder_class()
+        return encoder.compress(chunks[0]) + encoder.finish()
+    return b''.join(compress_stream(chunks, encoder_class()))
+
+
+def measure(encoder_class, chunks, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        size = len(compress(encoder_class, chunks))
+    return size, (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    from yacommon.middleware import ENCODERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = render_pages(
+            os.path.join(tmp, 'bench.sqlite3'), args.comments
+        )
+    for page, chunks in pages.items():
+        size = sum(map(len, chunks))
+        print(f'{page}: {size / 1024:.1f} КБ, частей: {len(chunks)}')
+        for encoder_class in ENCODERS:
+            for level in LEVELS[encoder_class.name]:
+                settings.COMPRESSION_GZIP_LEVEL = level
+                settings.COMPRESSION_BROTLI_QUALITY = level
+                compressed, ms = measure(encoder_class, chunks, args.repeats)
+                print(f'  {encoder_class.name:>4} {level:>2}: '
+                      f'{compressed / 1024:8.1f} КБ '
+                      f'({compressed / size:6.1%}), {ms:7.2f} мс')
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+    main()
@@ -0,0 +1,281 @@
+"""
+Задержка, число запросов к базе и пиковая память всех адресов YaNews.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.routes --sizes 1k 100k --repeats 30
+    python -m benchmarks.routes --check            # сравнить с эталоном
+    python -m benchmarks.routes --update-baseline  # записать эталон
+
+Для каждого размера создаётся временная база: size новостей и size
+комментариев, распределённых по HOT_NEWS новостям, так что на странице
+первой из них size / HOT_NEWS комментариев. Каждый именованный адрес
+из news.urls и users запрашивается тестовым клиентом repeats раз;
+печатаются p50/p95/p99 в мс, число SQL-запросов и пиковая память
+запроса (tracemalloc, отдельным запросом).
+
+С --check результаты сравниваются с routes_baseline.json: больше
+SQL-запросов, чем в эталоне, или p95 и память больше эталонных более
+чем на --tolerance — регрессия, и код выхода 1. Задержки зависят
+от машины, эталон стоит обновлять на той же машине, где идёт проверка.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import islice
+from pathlib import Path
+
+import django
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+DEFAULT_SIZES = ('1k', '100k')
+NAMESPACES = ('news', 'users')
+# Между сколькими новостями делятся комментарии.
+HOT_NEWS = 100
+BATCH_SIZE = 10_000
+BASELINE = Path(__file__).resolve().with_name('routes_baseline.json')
+# Разница меньше этих порогов не считается регрессией при любом
+# --tolerance: на быстрых адресах шум больше самих значений.
+MIN_P95_DELTA_MS = 1.0
+MIN_PEAK_DELTA_KB = 64.0
+
+
+@dataclass
+class Route:
+    # Ключи объектов из seed, которые передаются в reverse().
+    args: tuple = ()
+    # Запрашивать от имени автора комментариев.
+    login: bool = False
+    # Запрос разлогинивает клиент: логинимся заново перед каждым.
+    relogin: bool = False
+
+
+ROUTES = {
+    'news:home': Route(),
+    'news:detail': Route(args=('news',)),
+    'news:edit': Route(args=('comment',), login=True),
+    'news:delete': Route(args=('comment',), login=True),
+    'users:login': Route(),
+    'users:logout': Route(login=True, relogin=True),
+    'users:signup': Route(),
+}
+
+
+def named_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    names = set()
+    for namespace in NAMESPACES:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        names.update(
+            f'{namespace}:{name}' for name in sub_resolver.reverse_dict
+            if isinstance(name, str)
+        )
+    return names
+
+
+def batches(objects):
+    objects = iter(objects)
+    while batch := list(islice(objects, BATCH_SIZE)):
+        yield batch
+
+
+def seed(size):
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from news.models import Comment, News
+
+    with transaction.atomic():
+        author = get_user_model().objects.create(username='Автор')
+        today = date.today()
+        for batch in batches(
+            News(title=f'Новость {index}', text='Текст новости ' * 10,
+                 date=today - timedelta(days=index % 3650))
+            for index in range(size)
+        ):
+            News.objects.bulk_create(batch)
+        hot = list(
+            News.objects.order_by('id').values_list('id', flat=True)
+            [:HOT_NEWS]
+        )
+        for batch in batches(
+            Comment(news_id=hot[index % len(hot)], author=author,
+                    text=f'Комментарий номер {index} к новости')
+            for index in range(size)
+        ):
+            Comment.objects.bulk_create(batch)
+    comment = Comment.objects.filter(news_id=hot[0]).first()
+    return {'author': author, 'news': hot[0], 'comment': comment.pk}
+
+
+def request(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # Читаем по частям, не собирая ответ целиком в памяти.
+        for _ in response.streaming_content:
+            pass
+    assert response.status_code == 200, (url, response.status_code)
+
+
+def measure(client, url, route, author, repeats):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def get():
+        if route.relogin:
+            client.force_login(author)
+        request(client, url)
+
+    # Первый запрос компилирует шаблоны и наполняет кеши.
+    get()
+    timings = []
+    for _ in range(repeats):
+        if route.relogin:
+            client.force_login(author)
+        start = time.perf_counter()
+        request(client, url)
+        timings.append((time.perf_counter() - start) * 1000)
+    if route.relogin:
+        client.force_login(author)
+    with CaptureQueriesContext(connection) as queries:
+        request(client, url)
+    # Следующий запрос очистит журнал, из которого читает queries.
+    query_count = len(queries)
+    if route.relogin:
+        client.force_login(author)
+    tracemalloc.start()
+    request(client, url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50': round(percentiles[49], 3),
+        'p95': round(percentiles[94], 3),
+        'p99': round(percentiles[98], 3),
+        'queries': query_count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_size(size, path, repeats):
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    for cache in caches.all():
+        cache.clear()
+    objects = seed(SIZES[size])
+    anonymous, author_client = Client(), Client()
+    author_client.force_login(objects['author'])
+    results = {}
+    for name, route in sorted(ROUTES.items()):
+        url = reverse(name, args=[objects[key] for key in route.args])
+        client = author_client if route.login else anonymous
+        if route.relogin:
+            client = Client()
+        results[name] = measure(
+            client, url, route, objects['author'], repeats
+        )
+        print(f'{size:>5} {name:<14} ' + ' '.join(
+            f'{key} {value:>8}' for key, value in results[name].items()
+        ))
+    connection.close()
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Описания регрессий относительно эталона."""
+    found = []
+    for size, routes in results.items():
+        for name, result in routes.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                found.append(
+                    f'{size} {name}: запросов {result["queries"]}, '
+                    f'в эталоне {expected["queries"]}'
+                )
+            for key, minimum in (
+                ('p95', MIN_P95_DELTA_MS), ('peak_kb', MIN_PEAK_DELTA_KB)
+            ):
+                limit = max(
+                    expected[key] * (1 + tolerance), expected[key] + minimum
+                )
+                if result[key] > limit:
+                    found.append(
+                        f'{size} {name}: {key} {result[key]}, '
+                        f'в эталоне {expected[key]}'
+                    )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', default=DEFAULT_SIZES, choices=list(SIZES)
+    )
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check', action='store_true')
+    mode.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+    if args.check and not BASELINE.exists():
+        sys.exit(f'Нет {BASELINE.name}, запишите его: --update-baseline')
+
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    missing = named_urls() - set(ROUTES)
+    if missing:
+        sys.exit(f'Нет сценария для адресов: {", ".join(sorted(missing))}')
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            results[size] = run_size(
+                size, os.path.join(tmp, f'{size}.sqlite3'), args.repeats
+            )
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text()) if (
+            BASELINE.exists()
+        ) else {}
+        baseline.update(results)
+        BASELINE.write_text(
+            json.dumps(baseline, ensure_ascii=False, indent=1,
+                       sort_keys=True) + '\n',
+            encoding='utf-8',
+        )
+        print(f'Эталон записан в {BASELINE.name}')
+    elif args.check:
+        found = regressions(
+            results, json.loads(BASELINE.read_text(encoding='utf-8')),
+            args.tolerance,
+        )
+        for line in found:
+            print(f'РЕГРЕССИЯ {line}', file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print('Регрессий относительно эталона нет')
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+    main()
@@ -0,0 +1,129 @@
+"""
+Пропускная способность news:detail при разных профилях PRAGMA SQLite.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.sqlite_pragmas --readers 8 --writers 4 --seconds 5
+
+Для каждого профиля создаётся временная база в файле. Потоки-читатели
+запрашивают страницу новости (GET), потоки-писатели оставляют к ней
+комментарии (POST). В конце печатаются запросы в секунду для чтения
+и записи и число ошибок «database is locked».
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import django
+
+
+def prepare(profile, path):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+
+    from news.models import Comment, News
+
+    settings.SQLITE_PRAGMA_PROFILE = profile
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    news = News.objects.create(title='Новость', text='Текст')
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'writer{index}') for index in range(64)
+    )
+    users = list(User.objects.order_by('id'))
+    Comment.objects.bulk_create(
+        Comment(news=news, author=users[0], text=f'Комментарий {index}')
+        for index in range(50)
+    )
+    return news, users
+
+
+def worker(client, method, url, deadline, stats, lock):
+    from django.db import OperationalError, connection
+
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            if method == 'post':
+                response = client.post(url, {'text': 'Комментарий'})
+            else:
+                response = client.get(url)
+            assert response.status_code in (200, 302), response.status_code
+            done += 1
+        except OperationalError:
+            errors += 1
+    connection.close()
+    with lock:
+        stats[method] += done
+        stats['errors'] += errors
+
+
+def run(profile, path, args):
+    from django.test import Client
+    from django.urls import reverse
+
+    news, users = prepare(profile, path)
+    url = reverse('news:detail', args=(news.pk,))
+    clients = []
+    for index in range(args.readers + args.writers):
+        client = Client()
+        method = 'get'
+        if index >= args.readers:
+            client.force_login(users[index])
+            method = 'post'
+        clients.append((client, method))
+    stats = {'get': 0, 'post': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(client, method, url, deadline, stats, lock),
+        )
+        for client, method in clients
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'get_rps': stats['get'] / args.seconds,
+        'post_rps': stats['post'] / args.seconds,
+        'errors': stats['errors'],
+    }
+
+
+def main():
+    from yacommon.sqlite import PRAGMA_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--profiles', nargs='+', default=list(
+        PRAGMA_PROFILES
+    ), choices=list(PRAGMA_PROFILES))
+    args = parser.parse_args()
+    print(f'{args.readers} читателей, {args.writers} писателей, '
+          f'{args.seconds} с на профиль')
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            result = run(
+                profile, os.path.join(tmp, f'{profile}.sqlite3'), args
+            )
+            print(f"{profile:>10}: GET {result['get_rps']:7.1f} rps, "
+                  f"POST {result['post_rps']:7.1f} rps, "
+                  f"ошибок {result['errors']}")
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+    main()
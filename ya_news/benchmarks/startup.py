@@ -0,0 +1,112 @@
+"""
+Время запуска процесса и задержка первого запроса с прогревом и без.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.startup --repeats 5
+
+Каждый замер — новый процесс с настройками yanews.settings_production
+и временной базой. Процесс импортирует yanews.wsgi (это и есть
+«запуск»), затем по разу запрашивает страницы из PATHS и печатает
+время первого и второго запроса к каждой.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+PATHS = ('/', '/news/1/', '/auth/login/')
+MODES = {'cold': '0', 'warm': '1'}
+
+
+def request(application, path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    start = time.perf_counter()
+    body = application(
+        environ, lambda status, headers: statuses.append(status)
+    )
+    b''.join(body)
+    body.close()
+    duration = time.perf_counter() - start
+    assert statuses[0].startswith('200'), (path, statuses)
+    return duration * 1000
+
+
+def child():
+    start = time.perf_counter()
+    from yanews.wsgi import application
+    result = {'startup_ms': (time.perf_counter() - start) * 1000}
+    for path in PATHS:
+        result[f'first {path}'] = request(application, path)
+    for path in PATHS:
+        result[f'second {path}'] = request(application, path)
+    print(json.dumps(result))
+
+
+def prepare(env):
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        check=True, env=env,
+    )
+    subprocess.run(
+        [sys.executable, 'manage.py', 'loaddata', 'news.json',
+         '--verbosity', '0'],
+        check=True, env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            # Ключ нужен только чтобы загрузились боевые настройки.
+            'YANEWS_SECRET_KEY': 'startup-benchmark',
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'yanews.settings_production',
+            'YANEWS_DATABASE': os.path.join(tmp, 'bench.sqlite3'),
+        }
+        prepare(env)
+        results = {mode: [] for mode in MODES}
+        # Режимы чередуются, чтобы дисковый кеш ОС не давал
+        # преимущества одному из них.
+        for _ in range(args.repeats):
+            for mode, warm_up in MODES.items():
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.startup', '--child'],
+                    check=True, capture_output=True, text=True,
+                    env={**env, 'YANEWS_WARM_UP': warm_up},
+                ).stdout
+                results[mode].append(json.loads(output))
+    print(f'Медиана по {args.repeats} запускам, мс')
+    for metric in results['cold'][0]:
+        values = '  '.join(
+            f'{mode} {statistics.median(r[metric] for r in runs):7.1f}'
+            for mode, runs in results.items()
+        )
+        print(f'{metric:>22}: {values}')
+
+
+if __name__ == '__main__':
+    main()
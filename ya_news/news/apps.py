@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from yacommon.sqlite import setup_connection
+        connection_created.connect(
+            setup_connection, dispatch_uid='news.sqlite'
+        )
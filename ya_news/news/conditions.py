@@ -0,0 +1,125 @@
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from yacommon.pagination import paginate_keyset
+
+from .models import Comment, News
+
+# Ответ зависит от пользователя и параметров страницы, поэтому
+# валидаторы вычисляются один раз и сохраняются на запросе.
+VALIDATORS_ATTR = '_news_validators'
+
+
+def _etag(request, *parts):
+    """ETag из ключевых значений страницы, пользователя и параметров."""
+    raw = ':'.join(
+        str(part) for part in (
+            request.user.pk, request.GET.urlencode(), *parts
+        )
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _date_to_datetime(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def _latest(news, updated):
+    """
+    Самое позднее из даты новости, изменения и удаления
+    её комментариев.
+    """
+    moments = [_date_to_datetime(news.date)]
+    moments.extend(
+        moment for moment in (updated, news.comments_deleted)
+        if moment is not None
+    )
+    return max(moments)
+
+
+def _cached(compute):
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, VALIDATORS_ATTR):
+            setattr(request, VALIDATORS_ATTR, compute(request, **kwargs))
+        return getattr(request, VALIDATORS_ATTR)
+    return wrapper
+
+
+@_cached
+def home_validators(request):
+    """
+    Валидаторы главной страницы.
+
+    Строятся по той же странице новостей, что выводит NewsList, но
+    без текстов: дата, id и число комментариев каждой новости, а также
+    последнее изменение её комментариев берутся из индексов.
+    """
+    comments = Comment.objects.filter(news=OuterRef('pk')).values('news')
+    page = paginate_keyset(
+        News.objects.only('id', 'date', 'comments_deleted').annotate(
+            comment_count=Coalesce(
+                Subquery(comments.annotate(count=Count('pk')).values('count')),
+                0
+            ),
+            comments_updated=Subquery(
+                comments.annotate(last=Max('updated')).values('last')
+            ),
+        ),
+        ('-date', '-id'),
+        settings.NEWS_COUNT_ON_HOME_PAGE,
+        request.GET.get('cursor'),
+    )
+    keys = [
+        (news.pk, news.date, news.comment_count)
+        for news in page.object_list
+    ]
+    last_modified = max(
+        (
+            _latest(news, news.comments_updated)
+            for news in page.object_list
+        ),
+        default=None,
+    )
+    return _etag(request, keys), last_modified
+
+
+@_cached
+def detail_validators(request, pk):
+    """
+    Валидаторы страницы новости.
+
+    Число комментариев меняется при удалении, время updated — при
+    создании и редактировании; оба значения берутся из индекса
+    (news_id, updated). Время удаления хранится в самой новости.
+    """
+    news = get_object_or_404(
+        News.objects.only('id', 'date', 'comments_deleted'), pk=pk
+    )
+    comments = Comment.objects.filter(news=news).aggregate(
+        count=Count('pk'), updated=Max('updated')
+    )
+    return (
+        _etag(request, news.pk, news.date, *comments.values()),
+        _latest(news, comments['updated']),
+    )
+
+
+def home_etag(request, *args, **kwargs):
+    return home_validators(request)[0]
+
+
+def home_last_modified(request, *args, **kwargs):
+    return home_validators(request)[1]
+
+
+def detail_etag(request, *args, **kwargs):
+    return detail_validators(request, **kwargs)[0]
+
+
+def detail_last_modified(request, *args, **kwargs):
+    return detail_validators(request, **kwargs)[1]
@@ -2,14 +2,17 @@ from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import BadWordsFilter
 
 BAD_WORDS = (
     'редиска',
     'негодяй',
-    # Дополните список на своё усмотрение.
+    # Остальные слова перечислены в файле settings.BAD_WORDS_FILE.
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = BadWordsFilter(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +23,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if text in bad_words:
+            raise ValidationError(WARNING)
         return text
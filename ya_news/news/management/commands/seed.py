@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from news.seeding import SeedOptions, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями для нагрузочного тестирования. При одинаковых '
+        'параметрах и --seed результат одинаков.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedOptions()
+        parser.add_argument('--news', type=int, default=defaults.news)
+        parser.add_argument('--users', type=int, default=defaults.users)
+        parser.add_argument(
+            '--comments-per-news', type=float,
+            default=defaults.comments_per_news,
+            help='среднее число комментариев к новости',
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=defaults.alpha,
+            help='показатель степенного закона для числа комментариев, > 1',
+        )
+        parser.add_argument(
+            '--max-comments', type=int, default=defaults.max_comments,
+            help='наибольшее число комментариев к одной новости',
+        )
+        parser.add_argument(
+            '--news-words', type=int, nargs=2, default=defaults.news_words,
+            metavar=('MIN', 'MAX'), help='длина текста новости в словах',
+        )
+        parser.add_argument(
+            '--comment-words', type=int, nargs=2,
+            default=defaults.comment_words, metavar=('MIN', 'MAX'),
+            help='длина комментария в словах',
+        )
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=defaults.until,
+            help='дата самой свежей новости, ГГГГ-ММ-ДД; по умолчанию '
+                 'сегодня',
+        )
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='процессов, которые строят порции',
+        )
+
+    def progress(self, report):
+        self.stdout.write(
+            f'Новостей: {report.news}, комментариев: {report.comments}'
+        )
+
+    def handle(self, *args, **options):
+        if options['alpha'] <= 1:
+            raise CommandError('--alpha должен быть больше 1.')
+        seed_options = SeedOptions(
+            news=options['news'],
+            users=options['users'],
+            comments_per_news=options['comments_per_news'],
+            alpha=options['alpha'],
+            max_comments=options['max_comments'],
+            news_words=tuple(options['news_words']),
+            comment_words=tuple(options['comment_words']),
+            until=options['until'],
+            seed=options['seed'],
+        )
+        try:
+            report = seed(seed_options, options['workers'], self.progress)
+        except ValueError as error:
+            raise CommandError(error)
+        except IntegrityError as error:
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже есть: {error}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {report.seconds:.1f} с: пользователей '
+            f'{report.users}, новостей {report.news}, комментариев '
+            f'{report.comments}.'
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+def copy_created_to_updated(apps, schema_editor):
+    Comment = apps.get_model('news', 'Comment')
+    Comment.objects.update(updated=models.F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_news_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            copy_created_to_updated, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['news', 'updated'], name='comment_news_updated_idx'),
+        ),
+    ]
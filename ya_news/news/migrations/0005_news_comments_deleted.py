@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comments_deleted',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
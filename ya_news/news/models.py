@@ -8,9 +8,15 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Когда удалён последний из удалённых комментариев: удаление
+    # не оставляет строки, по которой Last-Modified узнал бы о нём.
+    comments_deleted = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -29,9 +35,18 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('news', 'updated'), name='comment_news_updated_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
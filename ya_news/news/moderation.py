@@ -0,0 +1,137 @@
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# Похожие латинские буквы и цифры, которыми подменяют кириллицу.
+LOOKALIKES = str.maketrans({
+    'ё': 'е',
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    '0': 'о',
+    '3': 'з',
+    '6': 'б',
+    '@': 'а',
+})
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет похожие символы."""
+    return text.lower().translate(LOOKALIKES)
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо — Корасик для поиска любого слова из списка.
+
+    Строится один раз, проверка текста занимает один проход по нему
+    независимо от количества слов.
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.terminal[state] = True
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.terminal[child] |= self.terminal[self.fail[child]]
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово из списка."""
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+def read_words(path):
+    """Слова из файла: по одному в строке, # начинает комментарий."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                yield word
+
+
+class BadWordsFilter:
+    """
+    Проверка текста на запрещённые слова.
+
+    К встроенному списку добавляются слова из файла
+    settings.BAD_WORDS_FILE; при изменении файла автомат
+    перестраивается при следующей проверке.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self._lock = threading.Lock()
+        self._source = None
+        self._matcher = None
+
+    def _file_state(self):
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        if not path:
+            return None, None
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return path, None
+
+    @property
+    def matcher(self):
+        source = self._file_state()
+        if source != self._source:
+            with self._lock:
+                if source != self._source:
+                    path, mtime = source
+                    words = list(self.words)
+                    if mtime is not None:
+                        words.extend(read_words(path))
+                    self._matcher = AhoCorasick(
+                        normalize(word) for word in words
+                    )
+                    self._source = source
+        return self._matcher
+
+    def __contains__(self, text):
+        return self.matcher.search(normalize(text))
@@ -2,16 +2,108 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test.utils import teardown_databases
 from django.utils import timezone
 
 # Импортируем модель заметки, чтобы создать экземпляр.
 from news.models import Comment, News
+from yacommon.snapshots import (
+    Restorer, build_datasets, dataset, setup_test_databases
+)
+
+COMMENTS_MANY_COUNT = 1000
+
+
+# Тестовая база создаётся из сохранённой схемы, наборы данных строятся
+# один раз и в тестах восстанавливаются из снимков.
+@pytest.fixture(scope='session')
+def django_db_setup(request, django_test_environment, django_db_blocker):
+    verbosity = request.config.option.verbose
+    with django_db_blocker.unblock():
+        config = setup_test_databases(verbosity)
+        build_datasets()
+    yield
+    with django_db_blocker.unblock():
+        teardown_databases(config, verbosity=verbosity)
+
+
+@pytest.fixture
+def datasets(db):
+    return Restorer()
+
+
+@dataset('author')
+def build_author():
+    return {'author': get_user_model().objects.create(username='Автор')}
+
+
+@dataset('news', parent='author')
+def build_news():
+    return {'news': News.objects.create(  # Создаём новость.
+        title='Заголовок',
+        text='Текст новости',
+    )}
+
+
+@dataset('comment', parent='news')
+def build_comment():
+    return {'comment': Comment.objects.create(  # Создаём комментарий.
+        text='Текст комментария',
+        author=get_user_model().objects.get(username='Автор'),
+        news=News.objects.get(title='Заголовок'),
+    )}
+
+
+@dataset('news_eleven')
+def build_news_eleven():
+    today = datetime.today()
+    all_news = []
+    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1):
+        news = News(
+            title=f'Новость {index}',
+            text='Просто текст.',
+            # Для каждой новости уменьшаем дату на index дней от today,
+            # где index - счётчик цикла.
+            date=today - timedelta(days=index)
+        )
+        all_news.append(news)
+    News.objects.bulk_create(all_news)
+    return {'news_eleven': all_news}
+
+
+@dataset('comments_three', parent='news')
+def build_comments_three():
+    author = get_user_model().objects.get(username='Автор')
+    news = News.objects.get(title='Заголовок')
+    now = timezone.now()
+    for index in range(3):
+        comment = Comment.objects.create(
+            text='Текст комментария',
+            author=author,
+            news=news
+        )
+        # created заполняется при создании, поэтому меняем его после.
+        comment.created = now + timedelta(days=index)
+        Comment.objects.filter(pk=comment.pk).update(created=comment.created)
+    return {'comment': comment}
+
+
+@dataset('comments_many', parent='news')
+def build_comments_many():
+    author = get_user_model().objects.get(username='Автор')
+    news = News.objects.get(title='Заголовок')
+    # Много комментариев к одной новости создаём одним запросом.
+    Comment.objects.bulk_create(
+        Comment(text=f'Комментарий {index}', author=author, news=news)
+        for index in range(COMMENTS_MANY_COUNT)
+    )
+    return {'news': news}
 
 
 @pytest.fixture
-# Используем встроенную фикстуру для модели пользователей django_user_model.
-def author(django_user_model):
-    return django_user_model.objects.create(username='Автор')
+def author(datasets):
+    return datasets.restore('author')['author']
 
 
 @pytest.fixture
@@ -21,23 +113,13 @@ def author_client(author, client):  # Вызываем фикстуру авто
 
 
 @pytest.fixture
-def news():
-    news = News.objects.create(  # Создаём новость.
-        title='Заголовок',
-        text='Текст новости',
-    )
-    return news
+def news(datasets):
+    return datasets.restore('news')['news']
 
 
 @pytest.fixture
-# Фикстура запрашивает другую фикстуру создания новости.
-def comment(author, news):
-    comment = Comment.objects.create(  # Создаём объект комментария.
-        text='Текст комментария',
-        author=author,
-        news=news
-    )
-    return comment
+def comment(datasets):
+    return datasets.restore('comment')['comment']
 
 
 @pytest.fixture
@@ -57,37 +139,13 @@ def pk_comment_for_args(comment):
 
 
 @pytest.fixture
-def news_eleven():
-    today = datetime.today()
-    all_news = []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1):
-        news = News(
-            title=f'Новость {index}',
-            text='Просто текст.',
-            # Для каждой новости уменьшаем дату на index дней от today,
-            # где index - счётчик цикла.
-            date=today - timedelta(days=index)
-        )
-        all_news.append(news)
-    News.objects.bulk_create(all_news)
-    return all_news
+def news_eleven(datasets):
+    return datasets.restore('news_eleven')['news_eleven']
 
 
 @pytest.fixture
-def comments_three(author, news):
-    now = timezone.now()
-    for index in range(3):
-        # Создаём объект и записываем его в переменную.
-        comment = Comment.objects.create(
-            text='Текст комментария',
-            author=author,
-            news=news
-        )
-        # Сразу после создания меняем время создания комментария.
-        comment.created = now + timedelta(days=index)
-        # И сохраняем эти изменения.
-        comment.save()
-    return comment
+def comments_three(datasets):
+    return datasets.restore('comments_three')['comment']
 
 
 # Данные для POST-запроса при создании комментария.
@@ -97,3 +155,8 @@ def form_data():
     return {
         'text': 'Новый текст комментария',
     }
+
+
+@pytest.fixture
+def comments_many(datasets):
+    return datasets.restore('comments_many')['news']
@@ -1,6 +1,57 @@
+import asyncio
+import gzip
+import zlib
+from http import HTTPStatus
+import tracemalloc
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
 from django.urls import reverse
+from news.models import Comment
+from news.pytest_tests.conftest import COMMENTS_MANY_COUNT
+from yacommon.middleware import CompressionMiddleware, SQLTraceMiddleware
+from yacommon.tracing import install_trace
+from yanews.middleware import ReplicaPinMiddleware
+
+# Допустимый прирост пиковой памяти на главной странице, в байтах.
+HOME_MEMORY_MARGIN = 64 * 1024
+
+
+def query_plans(client, url, table, **params):
+    """
+    Планы SQLite для выборок из table, выполненных при запросе.
+
+    План строится по запросу с параметрами, как его выполняет Django:
+    по подставленным литералам SQLite строит другой план.
+    """
+    queries = []
+
+    def record(execute, sql, sql_params, many, context):
+        queries.append((sql, sql_params))
+        return execute(sql, sql_params, many, context)
+
+    with connection.execute_wrapper(record):
+        client.get(url, params)
+    plans = []
+    with connection.cursor() as cursor:
+        for sql, sql_params in queries:
+            if f'FROM "{table}"' not in sql:
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', sql_params)
+            plans.append(' '.join(row[-1] for row in cursor.fetchall()))
+    return plans
+
+
+def home_peak_memory(client, url):
+    """Пиковая память, выделенная при запросе страницы."""
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
 
 
 # п.1 Количество новостей на главной странице — не более 10
@@ -75,3 +126,284 @@ def test_authorized_client_has_form(author_client, pk_news_for_args):
     url = reverse('news:detail', args=pk_news_for_args)
     response = author_client.get(url)
     assert 'form' in response.context
+
+
+# п.5 Главная страница выводит число комментариев без загрузки самих
+# комментариев: один запрос для ETag и один для страницы.
+@pytest.mark.django_db
+def test_home_comment_count_single_query(
+        client,
+        comments_many,
+        django_assert_num_queries
+):
+    url = reverse('news:home')
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    news = response.context['object_list'][0]
+    assert news.comment_count == COMMENTS_MANY_COUNT
+    assert f'Комментариев: {COMMENTS_MANY_COUNT}' in response.content.decode()
+
+
+# п.6 Память, нужная для главной страницы, не растёт
+# с количеством комментариев.
+@pytest.mark.django_db
+def test_home_memory_does_not_depend_on_comments(client, news, author):
+    url = reverse('news:home')
+    # Первый запрос прогревает шаблоны и URLconf.
+    client.get(url)
+    peak_without_comments = home_peak_memory(client, url)
+    Comment.objects.bulk_create(
+        Comment(text='Текст комментария' * 10, author=author, news=news)
+        for _ in range(COMMENTS_MANY_COUNT)
+    )
+    peak_with_comments = home_peak_memory(client, url)
+    assert peak_with_comments - peak_without_comments < HOME_MEMORY_MARGIN
+
+
+# п.7 Старые новости доступны по курсору, страницы не пересекаются.
+@pytest.mark.usefixtures('news_eleven')
+@pytest.mark.django_db
+def test_news_cursor_pagination(client):
+    url = reverse('news:home')
+    first_page = client.get(url).context
+    assert first_page['prev_cursor'] is None
+    second_page = client.get(
+        url, {'cursor': first_page['next_cursor']}
+    ).context
+    assert len(second_page['object_list']) == 1
+    assert second_page['next_cursor'] is None
+    # Вместе две страницы содержат все новости ровно по одному разу.
+    all_news = [
+        *first_page['object_list'], *second_page['object_list']
+    ]
+    assert len({news.pk for news in all_news}) == len(all_news)
+    # Курсор назад возвращает на первую страницу.
+    back_page = client.get(
+        url, {'cursor': second_page['prev_cursor']}
+    ).context
+    assert list(back_page['object_list']) == list(first_page['object_list'])
+
+
+# п.8 На испорченный курсор главная страница отвечает 404.
+@pytest.mark.django_db
+def test_news_broken_cursor(client):
+    response = client.get(reverse('news:home'), {'cursor': 'испорчен'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+# п.8.1 Страница по курсору ищет позицию по индексу, а не просматривает
+# индекс с первой новости: любая страница стоит как первая.
+@pytest.mark.usefixtures('news_eleven')
+@pytest.mark.django_db
+def test_news_cursor_uses_index_search(client):
+    url = reverse('news:home')
+    first_page = client.get(url).context
+    second_page = client.get(url, {'cursor': first_page['next_cursor']})
+    for cursor in (
+        first_page['next_cursor'], second_page.context['prev_cursor']
+    ):
+        plans = query_plans(client, url, 'news_news', cursor=cursor)
+        assert plans
+        for plan in plans:
+            assert 'SEARCH news_news USING INDEX news_date_id_idx' in plan
+            assert 'SCAN news_news' not in plan
+
+
+# п.9 Комментарии на странице новости выводятся порциями,
+# у автора загружается только имя.
+@pytest.mark.usefixtures('comments_three')
+@pytest.mark.django_db
+def test_comments_load_more(client, settings, pk_news_for_args):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    url = reverse('news:detail', args=pk_news_for_args)
+    first_page = client.get(url).context
+    assert len(first_page['comments']) == 2
+    assert 'password' in first_page['comments'][0].author.get_deferred_fields()
+    second_page = client.get(
+        url, {'comments_cursor': first_page['comments_cursor']}
+    ).context
+    assert len(second_page['comments']) == 1
+    assert second_page['comments_cursor'] is None
+    all_dates = [
+        comment.created
+        for comment in (*first_page['comments'], *second_page['comments'])
+    ]
+    assert all_dates == sorted(all_dates)
+
+
+# п.9.1 Следующая порция комментариев ищется по индексу сразу с места
+# курсора, а не просматривает обсуждение новости с начала.
+@pytest.mark.usefixtures('comments_three')
+@pytest.mark.django_db
+def test_comments_cursor_uses_index_search(
+        client, settings, pk_news_for_args
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    url = reverse('news:detail', args=pk_news_for_args)
+    cursor = client.get(url).context['comments_cursor']
+    plans = [
+        plan
+        for plan in query_plans(
+            client, url, 'news_comment', comments_cursor=cursor
+        )
+        if 'comment_news_created_idx' in plan
+    ]
+    assert plans
+    for plan in plans:
+        assert '(news_id=? AND created>?)' in plan
+
+
+# п.10 В потоковом режиме страница новости выводит все комментарии,
+# отдавая их порциями.
+@pytest.mark.usefixtures('comments_three')
+def test_detail_streaming(author_client, settings, pk_news_for_args):
+    settings.NEWS_DETAIL_STREAMING = True
+    settings.COMMENTS_STREAM_CHUNK_SIZE = 2
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = author_client.get(url)
+    assert response.streaming
+    content = b''.join(response.streaming_content).decode()
+    assert content.count('Текст комментария') == 3
+    assert 'Здесь никто ничего не написал' not in content
+    assert '<form' in content
+
+
+# п.11 В потоковом режиме новость без комментариев выводится как обычно.
+@pytest.mark.django_db
+def test_detail_streaming_without_comments(client, settings, pk_news_for_args):
+    settings.NEWS_DETAIL_STREAMING = True
+    url = reverse('news:detail', args=pk_news_for_args)
+    content = b''.join(client.get(url).streaming_content).decode()
+    assert 'Здесь никто ничего не написал' in content
+    assert content.rstrip().endswith('</html>')
+
+
+# п.12 Авторизованный пользователь не добавляет запросов к базе:
+# сессия и пользователь берутся из кеша.
+@pytest.mark.django_db
+def test_authenticated_home_without_auth_queries(
+        author_client,
+        author,
+        news,
+        django_assert_num_queries
+):
+    url = reverse('news:home')
+    # Первый запрос кладёт пользователя в кеш.
+    author_client.get(url)
+    with django_assert_num_queries(2):
+        response = author_client.get(url)
+    assert response.context['user'] == author
+    # После изменения пользователь перечитывается из базы.
+    author.username = 'Переименованный'
+    author.save()
+    with django_assert_num_queries(3):
+        response = author_client.get(url)
+    assert response.context['user'].username == 'Переименованный'
+
+
+# п.13 Большая страница новости сжимается gzip, если клиент его
+# принимает, а без Accept-Encoding отдаётся как есть.
+@pytest.mark.usefixtures('comments_many')
+def test_detail_gzip(client, pk_news_for_args):
+    url = reverse('news:detail', args=pk_news_for_args)
+    plain = client.get(url)
+    assert not plain.has_header('Content-Encoding')
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert len(response.content) < len(plain.content) / 5
+    assert gzip.decompress(response.content) == plain.content
+
+
+# п.14 Короткие ответы не сжимаются.
+def test_small_response_not_compressed(client, pk_comment_for_args):
+    # Анонимного пользователя перенаправят на страницу входа.
+    response = client.get(
+        reverse('news:edit', args=pk_comment_for_args),
+        HTTP_ACCEPT_ENCODING='gzip',
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert len(response.content) < settings.COMPRESSION_MIN_LENGTH
+    assert not response.has_header('Content-Encoding')
+
+
+# п.15 Потоковая страница сжимается по частям: каждая часть
+# распаковывается сразу, не дожидаясь конца ответа.
+@pytest.mark.usefixtures('comments_many')
+def test_detail_streaming_gzip(client, settings, pk_news_for_args):
+    settings.NEWS_DETAIL_STREAMING = True
+    settings.COMMENTS_STREAM_CHUNK_SIZE = 100
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response.streaming
+    assert response['Content-Encoding'] == 'gzip'
+    decompressor = zlib.decompressobj(31)
+    parts = [
+        decompressor.decompress(chunk)
+        for chunk in response.streaming_content
+    ]
+    assert len(parts) > COMMENTS_MANY_COUNT // 100
+    content = b''.join(parts).decode()
+    assert content.count('<p class="mb-0">') == COMMENTS_MANY_COUNT
+    assert content.rstrip().endswith('</html>')
+
+
+# п.16 Brotli выбирается, если клиент предпочитает его и пакет установлен.
+@pytest.mark.usefixtures('comments_many')
+def test_detail_brotli(client, pk_news_for_args):
+    brotli = pytest.importorskip('brotli')
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0.5, br')
+    assert response['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == client.get(url).content
+
+
+# п.17 Фикстуры из разных наборов данных совмещаются в одном тесте:
+# одиннадцать новостей и залогиненный автор.
+@pytest.mark.usefixtures('news_eleven')
+def test_home_for_author_with_news_eleven(author_client):
+    response = author_client.get(reverse('news:home'))
+    assert len(response.context['object_list']) == (
+        settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+
+
+# п.18 Комментарий и три комментария к той же новости из соседнего
+# набора выводятся вместе.
+def test_comment_with_comments_three(
+        client,
+        comment,
+        comments_three,
+        pk_news_for_args
+):
+    response = client.get(reverse('news:detail', args=pk_news_for_args))
+    pks = [item.pk for item in response.context['comments']]
+    assert len(pks) == 4
+    assert {comment.pk, comments_three.pk} <= set(pks)
+
+
+# п.19 Под ASGI middleware проекта не переводят цепочку в синхронный
+# режим: страница сжимается, запросы к БД попадают в трассировку.
+@pytest.mark.usefixtures('comments_many')
+def test_async_middleware_chain(settings, async_client, pk_news_for_args):
+    settings.SQL_TRACE = True
+    # Реплика указывает на ту же тестовую базу.
+    settings.DATABASE_REPLICAS = ['default']
+
+    async def get_response(request):
+        return HttpResponse()
+
+    for middleware in (
+        SQLTraceMiddleware, ReplicaPinMiddleware, CompressionMiddleware
+    ):
+        assert asyncio.iscoroutinefunction(middleware(get_response))
+    # Соединение теста открыто раньше, чем SQLTraceMiddleware
+    # загрузится в потоке цикла событий AsyncClient.
+    install_trace(connection)
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = async_to_sync(async_client.get)(
+        url, **{'accept-encoding': 'gzip'}
+    )
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Комментарий 0' in gzip.decompress(response.content).decode()
+    assert not response['X-SQL-Trace'].startswith('queries=0;')
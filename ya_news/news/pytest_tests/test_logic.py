@@ -1,11 +1,30 @@
+import os
+from contextlib import contextmanager
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connections
 from django.urls import reverse
+from django.utils.timezone import localdate, now
 # Импортируем из файла с формами список стоп-слов и предупреждение формы.
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.checks import check_shared_caches
+from news.forms import BAD_WORDS, WARNING, bad_words
+from news.models import Comment, News
 from pytest_django.asserts import assertFormError, assertRedirects
+from yanews import middleware
+from yanews.routers import PrimaryReplicaRouter, request_scope
+
+
+def sqlite_connection(path):
+    """Отдельное соединение Django с SQLite-базой в файле."""
+    settings_dict = {**connections['default'].settings_dict, 'NAME': path}
+    return connections['default'].__class__(settings_dict, alias='pragmas')
 
 
 # п.1 Анонимный пользователь не может создать коммент
@@ -136,3 +155,236 @@ def test_other_user_cant_delete_note(
     response = admin_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == 1
+
+
+# п.5 Повторный запрос страницы с тем же ETag получает 304
+# без рендеринга, а правка и удаление комментария меняют ETag.
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('pk_news_for_args')),
+    ),
+)
+def test_conditional_get(
+        author_client,
+        name,
+        args,
+        pk_comment_for_args,
+        form_data
+):
+    url = reverse(name, args=args)
+    edit_url = reverse('news:edit', args=pk_comment_for_args)
+    response = author_client.get(url)
+    etag = response['ETag']
+    assert response.has_header('Last-Modified')
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    author_client.post(edit_url, form_data)
+    edited_etag = author_client.get(url)['ETag']
+    if name == 'news:detail':
+        # На главной текст комментария не выводится, ETag не меняется.
+        assert edited_etag != etag
+    author_client.post(reverse('news:delete', args=pk_comment_for_args))
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=edited_etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+# п.5.1 Удаление последнего изменённого комментария не отводит
+# Last-Modified назад: клиент с одним If-Modified-Since получает
+# новую страницу.
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('pk_news_for_args')),
+    ),
+)
+def test_comment_delete_moves_last_modified(
+        author_client,
+        name,
+        args,
+        comment,
+        pk_comment_for_args
+):
+    # Точность Last-Modified — секунда: правка должна быть раньше
+    # удаления хотя бы на неё.
+    Comment.objects.filter(pk=comment.pk).update(
+        updated=now() - timedelta(minutes=1)
+    )
+    url = reverse(name, args=args)
+    last_modified = author_client.get(url)['Last-Modified']
+    author_client.post(reverse('news:delete', args=pk_comment_for_args))
+    response = author_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert response['Last-Modified'] != last_modified
+
+
+# п.6 Запрещённые слова находятся и при замене букв на похожие
+# латинские символы или ё на е.
+@pytest.mark.parametrize(
+    'text',
+    ('Ну ты и PEДИCKA', 'нeгoдяй', 'ре-диска, зато Редиска'),
+)
+def test_user_cant_use_disguised_bad_words(
+        author_client,
+        pk_news_for_args,
+        text
+):
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = author_client.post(url, data={'text': text})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+# п.7 Список запрещённых слов перечитывается из файла после изменения.
+def test_bad_words_file_reload(settings, tmp_path):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# пусто\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    assert 'ёжик в тумане' not in bad_words
+    words_file.write_text('ежик\n', encoding='utf-8')
+    # Меняем время изменения явно: запись может уложиться в тот же тик.
+    os.utime(words_file, ns=(0, 1))
+    assert 'ёжик в тумане' in bad_words
+
+
+# п.8 К каждому соединению с SQLite применяется профиль PRAGMA
+# из настроек, в том числе WAL для базы в файле.
+@pytest.mark.django_db
+def test_sqlite_pragma_profile_applied(settings, tmp_path):
+    settings.SQLITE_PRAGMA_PROFILE = 'production'
+    connection = sqlite_connection(tmp_path / 'pragmas.sqlite3')
+    try:
+        with connection.cursor() as cursor:
+            for name, expected in (
+                ('journal_mode', 'wal'),
+                ('synchronous', 1),
+                ('busy_timeout', 5000),
+                ('cache_size', -64 * 1024),
+                ('temp_store', 2),
+            ):
+                cursor.execute(f'PRAGMA {name}')
+                assert cursor.fetchone()[0] == expected, name
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db
+def test_unknown_sqlite_pragma_profile(settings, tmp_path):
+    settings.SQLITE_PRAGMA_PROFILE = 'turbo'
+    connection = sqlite_connection(tmp_path / 'pragmas.sqlite3')
+    with pytest.raises(ImproperlyConfigured):
+        connection.ensure_connection()
+
+
+# п.9 Чтение уходит в реплику, запись и чтение после записи —
+# в основную базу.
+def test_router_reads_from_replica_until_write(settings):
+    settings.DATABASE_REPLICAS = ['replica1']
+    router = PrimaryReplicaRouter()
+    # Вне запроса всё читается из основной базы.
+    assert router.db_for_read(News) == 'default'
+    with request_scope():
+        assert router.db_for_read(News) == 'replica1'
+        assert router.db_for_read(Session) == 'default'
+        assert router.db_for_write(Comment) == 'default'
+        assert router.db_for_read(News) == 'default'
+    with request_scope(pinned=True):
+        assert router.db_for_read(News) == 'default'
+
+
+# п.9.1 Все чтения одного запроса идут в одну и ту же реплику.
+def test_router_keeps_one_replica_per_request(settings):
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2', 'replica3']
+    router = PrimaryReplicaRouter()
+    chosen = set()
+    for _ in range(30):
+        with request_scope():
+            replicas = {router.db_for_read(News) for _ in range(20)}
+        assert len(replicas) == 1
+        chosen |= replicas
+    # Между запросами нагрузка по-прежнему делится между репликами.
+    assert len(chosen) > 1
+
+
+# п.10 После записи клиент закрепляется за основной базой,
+# простое чтение cookie не выставляет.
+def test_write_pins_client_to_primary(
+        settings,
+        monkeypatch,
+        author_client,
+        pk_news_for_args,
+        form_data
+):
+    # Реплика указывает на ту же тестовую базу.
+    settings.DATABASE_REPLICAS = ['default']
+    states = []
+
+    @contextmanager
+    def spy(pinned=False):
+        with request_scope(pinned) as state:
+            states.append(state)
+            yield state
+
+    monkeypatch.setattr(middleware, 'request_scope', spy)
+    url = reverse('news:detail', args=pk_news_for_args)
+    response = author_client.get(url)
+    assert settings.REPLICA_PIN_COOKIE not in response.cookies
+    response = author_client.post(url, data=form_data)
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+    author_client.get(url)
+    assert [state.pinned for state in states] == [False, False, True]
+    assert [state.wrote for state in states] == [False, True, False]
+
+
+def seeded_rows():
+    users = get_user_model().objects.filter(username__startswith='seed7_')
+    return (
+        list(users.values_list('id', 'username', 'date_joined')),
+        list(News.objects.values_list('id', 'title', 'text', 'date')),
+        list(Comment.objects.values_list(
+            'id', 'news_id', 'author_id', 'text', 'created', 'updated'
+        )),
+    )
+
+
+# п.11 Команда seed при одном и том же --seed создаёт те же строки,
+# комментарии пишутся не раньше даты новости.
+@pytest.mark.django_db
+def test_seed_is_reproducible():
+    args = (
+        'seed', '--news', '30', '--users', '5', '--comments-per-news', '4',
+        '--until', '2024-01-01', '--seed', '7',
+    )
+    call_command(*args, stdout=StringIO())
+    users, news, comments = seeded_rows()
+    assert (len(users), len(news)) == (5, 30)
+    assert comments
+    dates = {row[0]: row[3] for row in news}
+    assert all(
+        localdate(row[4]) >= dates[row[1]] and row[4] == row[5]
+        for row in comments
+    )
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    get_user_model().objects.filter(username__startswith='seed7_').delete()
+    call_command(*args, stdout=StringIO())
+    assert seeded_rows() == (users, news, comments)
+
+
+# п.12 check --deploy не пропускает кеш пользователей и сессий
+# в памяти процесса.
+def test_shared_cache_check(settings):
+    errors = check_shared_caches(None)
+    assert {error.id for error in errors} == {'news.E001'}
+    assert {error.msg.split(' = ')[0] for error in errors} == {
+        'AUTH_USER_CACHE_ALIAS', 'SESSION_CACHE_ALIAS',
+    }
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': '127.0.0.1:11211',
+        },
+    }
+    assert check_shared_caches(None) == []
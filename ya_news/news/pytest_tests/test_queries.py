@@ -0,0 +1,125 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from news.models import Comment, News
+from yacommon.snapshots import dataset
+
+ANONYMOUS, AUTHOR, READER = 'anonymous', 'author', 'reader'
+# Адреса админки — код Django, их бюджеты не проверяем.
+SKIP_NAMESPACES = {'admin'}
+# Сколько комментариев к новости в большом наборе.
+LARGE_COMMENTS = 300
+
+# Наибольшее число SQL-запросов: адрес -> метод -> роль -> запросов.
+# Бюджет не зависит от объёма данных и проверяется на двух наборах.
+QUERY_BUDGETS = {
+    'news:home': {'get': {ANONYMOUS: 2, AUTHOR: 3, READER: 3}},
+    'news:detail': {
+        'get': {ANONYMOUS: 4, AUTHOR: 5, READER: 5},
+        'post': {ANONYMOUS: 0, AUTHOR: 3, READER: 3},
+    },
+    'news:edit': {
+        'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2},
+        'post': {ANONYMOUS: 0, AUTHOR: 3, READER: 2},
+    },
+    'news:delete': {
+        'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2},
+        # Удаление отмечается в новости для Last-Modified.
+        'post': {ANONYMOUS: 0, AUTHOR: 4, READER: 2},
+    },
+    'users:login': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+    'users:logout': {'get': {ANONYMOUS: 0, AUTHOR: 3, READER: 3}},
+    'users:signup': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+}
+# Объект из набора, чей pk передаётся в адрес.
+ROUTE_ARGS = {
+    'news:detail': 'news',
+    'news:edit': 'comment',
+    'news:delete': 'comment',
+}
+POST_DATA = {
+    'news:detail': {'text': 'Новый комментарий'},
+    'news:edit': {'text': 'Исправленный комментарий'},
+    'news:delete': {},
+}
+CASES = [
+    (name, method, role)
+    for name, methods in QUERY_BUDGETS.items()
+    for method, roles in methods.items()
+    for role in roles
+]
+
+
+@dataset('queries_small', parent='comment')
+def build_queries_small():
+    return {'reader': get_user_model().objects.create(username='Читатель')}
+
+
+@dataset('queries_large', parent='comment')
+def build_queries_large():
+    author = get_user_model().objects.get(username='Автор')
+    reader = get_user_model().objects.create(username='Читатель')
+    news = News.objects.get(title='Заголовок')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст')
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE * 2)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news_item, author=user, text=f'Комментарий {index}')
+        for index, (news_item, user) in enumerate(
+            [(news, author), (news, reader)] * (LARGE_COMMENTS // 2)
+            + [(other, reader) for other in News.objects.exclude(pk=news.pk)]
+        )
+    )
+    return {'reader': reader}
+
+
+def named_routes():
+    """Имена всех адресов из ROOT_URLCONF вида namespace:name."""
+    names = set()
+    for namespace, (_, resolver) in get_resolver().namespace_dict.items():
+        if namespace in SKIP_NAMESPACES:
+            continue
+        names.update(
+            f'{namespace}:{name}' for name in resolver.reverse_dict
+            if isinstance(name, str)
+        )
+    return names
+
+
+# п.1 Бюджет запросов объявлен для каждого адреса проекта.
+def test_every_route_has_query_budget():
+    assert named_routes() == set(QUERY_BUDGETS)
+
+
+# п.2 Ни один адрес не превышает бюджет запросов ни для одной роли,
+# ни на маленьком, ни на большом наборе данных.
+@pytest.mark.parametrize('size', ('queries_small', 'queries_large'))
+@pytest.mark.parametrize('name, method, role', CASES)
+def test_query_budget(
+        client, datasets, author, comment, name, method, role, size
+):
+    reader = datasets.restore(size)['reader']
+    objects = {'news': comment.news_id, 'comment': comment.pk}
+    if role == AUTHOR:
+        client.force_login(author)
+    elif role == READER:
+        client.force_login(reader)
+    args = (objects[ROUTE_ARGS[name]],) if name in ROUTE_ARGS else ()
+    url = reverse(name, args=args)
+    data = POST_DATA.get(name, {}) if method == 'post' else {}
+    budget = QUERY_BUDGETS[name][method][role]
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, data)
+        # Потоковый ответ выполняет запросы при чтении.
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    assert len(queries) <= budget, (
+        f'{method.upper()} {url} от {role}: {len(queries)} запросов '
+        f'при бюджете {budget}:\n'
+        + '\n'.join(query['sql'] for query in queries.captured_queries)
+    )
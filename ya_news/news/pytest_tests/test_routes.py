@@ -1,8 +1,15 @@
+import logging
 from http import HTTPStatus
 
 import pytest
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory
 from django.urls import reverse
+from news.models import Comment
 from pytest_django.asserts import assertRedirects
+from yacommon.middleware import SQLTraceMiddleware
+from yacommon.warmup import project_templates, warm_up
 
 
 # п.1: Главная страница доступна анонимному пользователю.
@@ -80,3 +87,41 @@ def test_redirects(client, name, args):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+# п.7 Трассировка SQL сообщает число запросов и находит повторяющиеся;
+# при редактировании комментарий загружается один раз.
+def test_sql_trace_reports_repeated_queries(
+        author_client,
+        settings,
+        pk_comment_for_args,
+        form_data
+):
+    settings.SQL_TRACE = True
+    settings.SQL_TRACE_N_PLUS_ONE_THRESHOLD = 2
+    url = reverse('news:edit', args=pk_comment_for_args)
+    response = author_client.post(url, form_data)
+    assert 'n+1=0' in response['X-SQL-Trace']
+
+    def get_response(request):
+        # Один и тот же запрос дважды — как при N+1.
+        for _ in range(2):
+            Comment.objects.filter(pk=pk_comment_for_args[0]).exists()
+        return HttpResponse()
+
+    response = SQLTraceMiddleware(get_response)(RequestFactory().get(url))
+    assert response['X-SQL-Trace'].startswith('queries=2;')
+    assert 'n+1=1' in response['X-SQL-Trace']
+
+
+# п.8 Прогрев при запуске компилирует все шаблоны проекта
+# и не обращается к базе.
+@pytest.mark.django_db
+def test_warm_up(settings, caplog, django_assert_num_queries):
+    settings.WARM_UP = True
+    names = project_templates(engines['django'])
+    assert {'news/home.html', 'news/detail.html', 'base.html'} <= set(names)
+    with caplog.at_level(logging.INFO, logger='yacommon.warmup'):
+        with django_assert_num_queries(0):
+            warm_up()
+    assert f'{len(names)} templates' in caplog.text
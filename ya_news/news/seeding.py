@@ -0,0 +1,240 @@
+"""
+Синтетические данные для нагрузочного тестирования.
+
+Результат зависит только от параметров SeedOptions: каждая порция
+из CHUNK_SIZE новостей получает свой генератор случайных чисел,
+а id всех строк вычисляются заранее. Поэтому число процессов
+и размер пачек bulk_create на результат не влияют.
+
+Процессы пула только строят порции: SQLite допускает одного
+писателя, и все bulk_create выполняет основной процесс.
+"""
+import os
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from multiprocessing import get_context
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Comment, News
+
+# Новостей в одной порции; от него зависит результат, не меняйте.
+CHUNK_SIZE = 1000
+BATCH_SIZE = 5000
+# Пароль, с которым нельзя войти: хешировать миллионы паролей незачем.
+UNUSABLE_PASSWORD = '!seed'
+# За сколько дней до until распределены даты новостей.
+NEWS_DAYS = 3650
+# Сколько дней после новости к ней пишут комментарии.
+COMMENT_DAYS = 30
+WORDS = (
+    'город', 'новость', 'погода', 'выборы', 'школа', 'театр', 'концерт',
+    'дорога', 'мост', 'парк', 'ёлка', 'праздник', 'футбол', 'хоккей',
+    'библиотека', 'музей', 'выставка', 'рынок', 'цены', 'урожай', 'зима',
+    'весна', 'лето', 'осень', 'метро', 'трамвай', 'аэропорт', 'вокзал',
+    'больница', 'университет', 'студенты', 'учёные', 'открытие', 'ремонт',
+    'строительство', 'жители', 'мэрия', 'фестиваль', 'кино', 'премьера',
+    'снег', 'дождь', 'жара', 'река', 'лес', 'озеро', 'набережная',
+    'площадь', 'улица', 'двор', 'соседи', 'собака', 'кошка', 'щенок',
+    'чемпионат', 'победа', 'рекорд', 'юбилей', 'съезд', 'объявление',
+)
+
+
+@dataclass
+class SeedOptions:
+    news: int = 1000
+    users: int = 100
+    # Среднее число комментариев к новости и показатель степенного
+    # закона: чем ближе alpha к 1, тем длиннее хвост популярных новостей.
+    comments_per_news: float = 10.0
+    alpha: float = 1.5
+    max_comments: int = 10_000
+    # Длина текста новости и комментария в словах, от и до.
+    news_words: tuple = (30, 300)
+    comment_words: tuple = (3, 60)
+    until: date = field(default_factory=date.today)
+    seed: int = 0
+
+
+@dataclass
+class Chunk:
+    index: int
+    first_news_id: int
+    comment_counts: list
+    first_comment_id: int
+
+
+@dataclass
+class SeedReport:
+    users: int = 0
+    news: int = 0
+    comments: int = 0
+    seconds: float = 0.0
+
+
+def chunk_random(options, kind, index=0):
+    return random.Random(f'{options.seed}:{kind}:{index}')
+
+
+def power_law(rng, mean, alpha, cap):
+    """Целое со средним около mean и распределением Парето."""
+    scale = mean * (alpha - 1) / alpha
+    return min(cap, int(scale * rng.paretovariate(alpha)))
+
+
+def words(rng, bounds):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(*bounds)))
+
+
+def title(rng, max_length):
+    text = words(rng, (2, 6)).capitalize()
+    return text[:max_length].rstrip()
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """
+    Отключает auto_now и auto_now_add, чтобы bulk_create сохранил
+    заданные даты, а не текущее время.
+    """
+    fields = [
+        (model_field, model_field.auto_now, model_field.auto_now_add)
+        for model_field in model._meta.concrete_fields
+        if getattr(model_field, 'auto_now_add', False)
+        or getattr(model_field, 'auto_now', False)
+    ]
+    for model_field, _, _ in fields:
+        model_field.auto_now = model_field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for model_field, auto_now, auto_now_add in fields:
+            model_field.auto_now = auto_now
+            model_field.auto_now_add = auto_now_add
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def create_users(options):
+    User = get_user_model()
+    first_id = next_id(User)
+    joined = start_of(options.until - timedelta(days=NEWS_DAYS))
+    User.objects.bulk_create(
+        (
+            User(id=first_id + index, username=f'seed{options.seed}_{index}',
+                 password=UNUSABLE_PASSWORD, date_joined=joined)
+            for index in range(options.users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return first_id
+
+
+def plan(options):
+    """Порции новостей с заранее вычисленными id строк."""
+    first_news_id, first_comment_id = next_id(News), next_id(Comment)
+    chunks = []
+    for index, start in enumerate(range(0, options.news, CHUNK_SIZE)):
+        rng = chunk_random(options, 'counts', index)
+        counts = [
+            power_law(
+                rng, options.comments_per_news, options.alpha,
+                options.max_comments,
+            )
+            for _ in range(min(CHUNK_SIZE, options.news - start))
+        ]
+        chunks.append(Chunk(
+            index, first_news_id + start, counts, first_comment_id
+        ))
+        first_comment_id += sum(counts)
+    return chunks
+
+
+def build_chunk(chunk, options, first_user_id):
+    rng = chunk_random(options, 'rows', chunk.index)
+    max_title = News._meta.get_field('title').max_length
+    news, comments = [], []
+    comment_ids = accumulate(chunk.comment_counts, initial=0)
+    for offset, (count, comment_offset) in enumerate(
+        zip(chunk.comment_counts, comment_ids)
+    ):
+        news_id = chunk.first_news_id + offset
+        news_date = options.until - timedelta(days=rng.randrange(NEWS_DAYS))
+        news.append(News(
+            id=news_id, title=title(rng, max_title),
+            text=words(rng, options.news_words), date=news_date,
+        ))
+        published = start_of(news_date)
+        for number in range(count):
+            created = published + timedelta(
+                seconds=rng.randrange(COMMENT_DAYS * 24 * 3600)
+            )
+            comments.append(Comment(
+                id=chunk.first_comment_id + comment_offset + number,
+                news_id=news_id,
+                author_id=first_user_id + rng.randrange(options.users),
+                text=words(rng, options.comment_words),
+                created=created, updated=created,
+            ))
+    return news, comments
+
+
+def write_chunk(news, comments):
+    """Сохраняет одну порцию; возвращает число строк."""
+    with explicit_timestamps(Comment), transaction.atomic():
+        News.objects.bulk_create(news, batch_size=BATCH_SIZE)
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+    return len(news), len(comments)
+
+
+def _init_worker(settings_module):
+    # Под spawn процесс начинается без настроенного Django.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _build_chunk(args):
+    return build_chunk(*args)
+
+
+def seed(options, workers=1, progress=None):
+    """Создаёт пользователей, новости и комментарии по options."""
+    if options.users < 1:
+        raise ValueError('Комментариям нужен хотя бы один пользователь.')
+    started = time.perf_counter()
+    report = SeedReport(users=options.users)
+    with transaction.atomic():
+        first_user_id = create_users(options)
+    tasks = [(chunk, options, first_user_id) for chunk in plan(options)]
+    with ExitStack() as stack:
+        chunks = map(_build_chunk, tasks)
+        if workers > 1:
+            # Соединение с базой не должно достаться дочерним процессам.
+            connections.close_all()
+            pool = stack.enter_context(get_context().Pool(
+                workers, _init_worker,
+                (os.environ['DJANGO_SETTINGS_MODULE'],),
+            ))
+            chunks = pool.imap_unordered(_build_chunk, tasks)
+        for news, comments in chunks:
+            news_count, comments_count = write_chunk(news, comments)
+            report.news += news_count
+            report.comments += comments_count
+            if progress:
+                progress(report)
+    report.seconds = time.perf_counter() - started
+    return report
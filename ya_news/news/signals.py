@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from yacommon.auth import invalidate_user
+
+from .models import Comment, News
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def mark_comments_deleted(sender, instance, **kwargs):
+    News.objects.filter(pk=instance.news_id).update(
+        comments_deleted=timezone.now()
+    )
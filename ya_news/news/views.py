@@ -1,39 +1,107 @@
+from itertools import islice
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
+from yacommon.pagination import paginate_keyset
 
+from . import conditions
 from .forms import CommentForm
 from .models import Comment, News
 
 
+@method_decorator(
+    condition(conditions.home_etag, conditions.home_last_modified),
+    name='get'
+)
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    ordering = ('-date', '-id')
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим одну страницу новостей, от свежих к старым.
+
+        Размер страницы определяется в настройках проекта, переход между
+        страницами — по курсору из параметра cursor.
+        Число комментариев считается подзапросом по индексу в том же
+        запросе, сами комментарии не загружаются. GROUP BY по новостям
+        здесь не подходит: он заставил бы базу сортировать весь диапазон
+        до LIMIT.
+        """
+        comment_count = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).values('news').annotate(count=Count('pk')).values('count')
+        self.page = paginate_keyset(
+            self.model.objects.annotate(
+                comment_count=Coalesce(Subquery(comment_count), 0)
+            ),
+            self.ordering,
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+            self.request.GET.get('cursor'),
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        context['prev_cursor'] = self.page.prev_cursor
+        return context
+
+
+class CommentsPageMixin:
+    """Добавляет в контекст страницу комментариев к новости."""
+    comments_ordering = ('created', 'id')
 
-        Их количество определяется в настройках проекта.
+    def get_comments_queryset(self):
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        Комментарии новости вместе с автором одним запросом.
 
+        Загружаем только поля, которые выводит шаблон: хеш пароля
+        и остальные поля пользователя в память не попадают.
+        """
+        return Comment.objects.filter(
+            news=self.object
+        ).select_related('author').only(
+            'text', 'created', 'author', 'author__username'
+        )
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
+    def get_comments_context(self):
+        """
+        Порция комментариев после курсора comments_cursor.
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+        Фильтр курсора вместе с news_id задаёт диапазон индекса
+        comment_news_created_idx, и дальние порции стоят как первая.
+        """
+        page = paginate_keyset(
+            self.get_comments_queryset(),
+            self.comments_ordering,
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+            self.request.GET.get('comments_cursor'),
         )
-        return obj
+        return {
+            'comments': page.object_list,
+            'comments_cursor': page.next_cursor,
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context())
+        return context
+
+
+class NewsDetail(CommentsPageMixin, generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +110,50 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsDetailStream(NewsDetail):
+    """
+    Новость со всеми комментариями, отдаваемая потоком.
+
+    Шапка и текст новости уходят клиенту сразу, комментарии читаются
+    из базы порциями и рендерятся по мере чтения, поэтому память
+    не зависит от размера обсуждения.
+    """
+    comments_template_name = 'news/includes/comments.html'
+    # Метка в news/detail.html, на месте которой выводятся комментарии.
+    comments_marker = '<!--comments-->'
+
+    def get_comments_context(self):
+        return {'streaming': True}
+
+    def render_to_response(self, context, **response_kwargs):
+        page = render_to_string(
+            self.get_template_names(), context, self.request
+        )
+        head, tail = page.split(self.comments_marker, 1)
+        return StreamingHttpResponse(
+            self.stream_page(head, tail), **response_kwargs
+        )
+
+    def stream_page(self, head, tail):
+        yield head
+        template = get_template(self.comments_template_name)
+        chunk_size = settings.COMMENTS_STREAM_CHUNK_SIZE
+        comments = self.get_comments_queryset().order_by(
+            *self.comments_ordering
+        ).iterator(chunk_size=chunk_size)
+        streamed = False
+        chunks = iter(lambda: list(islice(comments, chunk_size)), [])
+        for chunk in chunks:
+            streamed = True
+            yield template.render({'comments': chunk}, self.request)
+        if not streamed:
+            yield template.render({'comments': ()}, self.request)
+        yield tail
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -63,14 +173,22 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        # Новость уже загружена в post(), второй запрос не нужен.
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(
+        condition(conditions.detail_etag, conditions.detail_last_modified)
+    )
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
+        if settings.NEWS_DETAIL_STREAMING:
+            view = NewsDetailStream.as_view()
+        else:
+            view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -83,14 +201,22 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        # Комментарий уже загружен представлением, а для адреса
+        # достаточно news_id: ни комментарий, ни новость не перечитываем.
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости нужен шаблонам, поэтому новость загружается
+        тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from yacommon.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
 application = get_asgi_application()
+
+# Шаблоны и URLconf готовятся до первого запроса.
+warm_up()
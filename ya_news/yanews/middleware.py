@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from yacommon.middleware import async_mode
+
+from .routers import request_scope
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет чтение за основной базой после записи.
+
+    Если во время запроса была запись, клиент получает cookie
+    REPLICA_PIN_COOKIE на REPLICA_PIN_SECONDS секунд; пока она
+    действует, его запросы читают из основной базы и видят свои
+    изменения, даже если реплики ещё не догнали основную базу.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie = settings.REPLICA_PIN_COOKIE
+        self.seconds = settings.REPLICA_PIN_SECONDS
+        self.is_async = async_mode(self)
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES[self.cookie]) > time.time()
+        except (KeyError, ValueError):
+            return False
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with request_scope(pinned=self.is_pinned(request)) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with request_scope(pinned=self.is_pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                self.cookie,
+                str(time.time() + self.seconds),
+                max_age=self.seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
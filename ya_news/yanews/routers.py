@@ -0,0 +1,78 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@dataclass
+class RequestState:
+    # Чтение закреплено за основной базой.
+    pinned: bool = False
+    # В этом запросе уже была запись.
+    wrote: bool = False
+    # Реплика, выбранная при первом чтении: все чтения запроса видят
+    # один снимок данных, даже если реплики отстают по-разному.
+    replica: str = None
+
+
+# Состояние текущего запроса; вне запроса (команды, shell) — None,
+# и тогда всё читается из основной базы.
+_state = ContextVar('replica_routing', default=None)
+
+
+@contextmanager
+def request_scope(pinned=False):
+    """Состояние маршрутизатора на время одного запроса."""
+    state = RequestState(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись — в основную базу, чтение — в одну из реплик, выбранную
+    случайно один раз на запрос.
+
+    Реплики перечислены в DATABASE_REPLICAS. Чтение остаётся
+    на основной базе вне запроса, если запрос закреплён за ней (см.
+    ReplicaPinMiddleware), если в этом запросе уже была запись
+    или если идёт транзакция.
+    """
+    # Сессии читаются на каждом запросе, устаревшая сессия на реплике
+    # разлогинила бы пользователя сразу после входа.
+    primary_apps = {'sessions'}
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        state = _state.get()
+        if (not replicas or state is None or state.pinned or state.wrote
+                or model._meta.app_label in self.primary_apps
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        if state.replica not in replicas:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными при копировании.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.SQLTraceMiddleware',
+    'yanews.middleware.ReplicaPinMiddleware',
+    'yacommon.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,9 +62,71 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: копии основной базы, которые
+# обновляет команда sync_replicas. Их число задаёт YANEWS_DB_REPLICAS.
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('YANEWS_DB_REPLICAS', 0)) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+# После записи клиент читает из основной базы столько секунд.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Профиль PRAGMA для соединений с SQLite, см. yacommon.sqlite.
+SQLITE_PRAGMA_PROFILE = 'production'
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Пользователь сессии берётся из кеша, см. yacommon.auth.
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Кеш в памяти процесса подходит для разработки и тестов. В бою кеши
+# должны быть общими для всех процессов, см. settings_production.py
+# и news.checks.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Сессии читаются из кеша, изменения пишутся и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Трассировка SQL-запросов: yacommon.middleware.SQLTraceMiddleware.
+SQL_TRACE = False
+SQL_TRACE_N_PLUS_ONE_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'sqltrace': {
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'sqltrace.log',
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['sqltrace'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -80,3 +146,29 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+BAD_WORDS_FILE = BASE_DIR / 'news' / 'bad_words.txt'
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+# Отдавать страницу новости со всеми комментариями потоком.
+NEWS_DETAIL_STREAMING = False
+COMMENTS_STREAM_CHUNK_SIZE = 500
+
+# Прогрев процесса при запуске, включён в settings_production.
+WARM_UP = False
+
+# Сжатие ответов, см. yacommon.middleware.CompressionMiddleware.
+COMPRESSION_MIN_LENGTH = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# Уже сжатые форматы сжимать бесполезно.
+COMPRESSION_SKIP_TYPES = (
+    'image/',
+    'video/',
+    'audio/',
+    'font/woff',
+    'application/zip',
+    'application/gzip',
+    'application/x-brotli',
+)
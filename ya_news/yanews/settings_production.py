@@ -0,0 +1,23 @@
+"""
+Настройки для боевого запуска.
+
+DJANGO_SETTINGS_MODULE=yanews.settings_production, остальное задаётся
+переменными окружения YANEWS_SECRET_KEY, YANEWS_ALLOWED_HOSTS,
+YANEWS_DATABASE и YANEWS_CACHE_LOCATION.
+
+Если процессов несколько, кеш должен быть общим: адрес memcached
+(host:port, несколько через запятую) задаётся в YANEWS_CACHE_LOCATION,
+нужен пакет pymemcache. manage.py check --deploy проверяет это.
+"""
+from yacommon import production
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, TEMPLATES
+
+DEBUG = False
+SECRET_KEY = production.secret_key('YANEWS')
+ALLOWED_HOSTS = production.allowed_hosts('YANEWS')
+DATABASES = production.databases('YANEWS', DATABASES)
+CACHES = production.caches('YANEWS', CACHES)
+TEMPLATES = production.cached_templates(TEMPLATES)
+WARM_UP = production.warm_up('YANEWS')
@@ -0,0 +1,204 @@
+"""
+Сравнение YaNote под WSGI и под ASGI с асинхронными представлениями.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.asgi_vs_wsgi --requests 2000 --concurrency 32
+
+Готовит временную базу с пользователем и заметками, затем в отдельных
+процессах гоняет GET-запросы к списку и к странице заметки напрямую
+через WSGI- и ASGI-приложения, без сетевого сервера. Для WSGI
+параллельность даёт пул потоков (как у многопоточного сервера),
+для ASGI — задачи asyncio в одном цикле событий.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+PATHS = ('/notes/', '/note/note-0/')
+
+
+def setup_django(db_path, async_views):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'yanote.settings'
+    os.environ['YANOTE_ASYNC_VIEWS'] = '1' if async_views else '0'
+    import django
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    django.setup()
+
+
+def prepare(db_path, notes):
+    """Создаёт базу, автора с заметками и возвращает cookie сессии."""
+    setup_django(db_path, async_views=False)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+
+    from notes.models import Note
+
+    call_command('migrate', verbosity=0)
+    author = get_user_model().objects.create(username='bench')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {i}', text='Текст ' * 50, slug=f'note-{i}',
+             author=author)
+        for i in range(notes)
+    )
+    client = Client()
+    client.force_login(author)
+    return client.cookies['sessionid'].value
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summary(mode, latencies, elapsed):
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run_wsgi(session, total, concurrency):
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    latencies = []
+    lock = threading.Lock()
+
+    def one(index):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': PATHS[index % len(PATHS)],
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'testserver',
+            'HTTP_COOKIE': f'sessionid={session}',
+            'wsgi.input': BytesIO(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+        }
+        statuses = []
+        start = time.perf_counter()
+        body = application(
+            environ, lambda status, headers: statuses.append(status)
+        )
+        b''.join(body)
+        body.close()
+        duration = time.perf_counter() - start
+        assert statuses[0].startswith('200'), statuses
+        with lock:
+            latencies.append(duration)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return summary('wsgi', latencies, time.perf_counter() - start)
+
+
+def run_asgi(session, total, concurrency):
+    from django.core.asgi import get_asgi_application
+    application = get_asgi_application()
+    latencies = []
+
+    async def one(index):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': PATHS[index % len(PATHS)],
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'sessionid={session}'.encode()),
+            ],
+            'server': ('testserver', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        latencies.append(time.perf_counter() - start)
+        assert messages[0]['status'] == 200, messages[0]
+
+    async def worker(indexes):
+        for index in indexes:
+            await one(index)
+
+    async def main():
+        await asyncio.gather(*(
+            worker(range(offset, total, concurrency))
+            for offset in range(concurrency)
+        ))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return summary('asgi', latencies, time.perf_counter() - start)
+
+
+def child(args):
+    setup_django(args.db, async_views=args.mode == 'asgi')
+    run = run_asgi if args.mode == 'asgi' else run_wsgi
+    # Прогрев: шаблоны, соединения, пул потоков.
+    run(args.session, args.concurrency, args.concurrency)
+    print(json.dumps(run(args.session, args.requests, args.concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--notes', type=int, default=100)
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'))
+    parser.add_argument('--db')
+    parser.add_argument('--session')
+    args = parser.parse_args()
+    if args.mode:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        session = prepare(db_path, args.notes)
+        print(f'{args.requests} GET-запросов, {args.concurrency} '
+              f'одновременно, {args.notes} заметок')
+        for mode in ('wsgi', 'asgi'):
+            # Каждый режим в чистом процессе: urls.py читает настройку
+            # NOTES_ASYNC_VIEWS один раз при импорте.
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.asgi_vs_wsgi',
+                 '--mode', mode, '--db', db_path, '--session', session,
+                 '--requests', str(args.requests),
+                 '--concurrency', str(args.concurrency)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['mode']}: {result['rps']:8.1f} rps, "
+                  f"p50 {result['p50_ms']:7.2f} мс, "
+                  f"p99 {result['p99_ms']:7.2f} мс")
+
+
+if __name__ == '__main__':
+    main()
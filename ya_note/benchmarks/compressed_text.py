@@ -0,0 +1,120 @@
+"""
+Размер базы и скорость записи и чтения заметок со сжатием текста и без.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.compressed_text --notes 2000 --large-share 0.05
+
+Для каждого режима создаётся временная база, в неё пишутся заметки:
+большинство короткие, доля large-share — размером около large-size байт.
+Режим «plain» — то же поле с выключенным сжатием, то есть прежнее
+поведение TextField.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import django
+
+WORDS = (
+    'заметка', 'встреча', 'план', 'список', 'идея', 'проект', 'задача',
+    'note', 'meeting', 'todo', '2024', 'срочно', 'потом', 'ёжик',
+)
+
+
+def make_text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word.encode()) + 1
+    return ' '.join(words)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(mode, path, texts, method):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+
+    from notes.models import Note
+
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    field = Note._meta.get_field('text')
+    field.threshold = float('inf') if mode == 'plain' else 16 * 1024
+    field.method = method
+    author = get_user_model().objects.create(username=mode)
+
+    def write():
+        for index, text in enumerate(texts):
+            Note.objects.create(
+                title=f'Заметка {index}', text=text, slug=f'n{index}',
+                author=author,
+            )
+
+    def read_titles():
+        # Страницы без текста его не загружают, как список заметок.
+        for note in Note.objects.defer('text'):
+            note.title
+
+    def read_texts():
+        for note in Note.objects.all():
+            note.text
+
+    write_ms = timed(write)
+    titles_ms = timed(read_titles)
+    texts_ms = timed(read_texts)
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    connection.close()
+    return {
+        'size_kb': os.path.getsize(path) / 1024,
+        'write_ms': write_ms,
+        'read_titles_ms': titles_ms,
+        'read_texts_ms': texts_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--large-share', type=float, default=0.05)
+    parser.add_argument('--large-size', type=int, default=1024 * 1024)
+    parser.add_argument('--method', choices=('zlib', 'lzma'),
+                        default='zlib')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    django.setup()
+    rng = random.Random(args.seed)
+    texts = [
+        make_text(rng, args.large_size if rng.random() < args.large_share
+                  else rng.randint(50, 2000))
+        for _ in range(args.notes)
+    ]
+    print(f'{args.notes} заметок, больших {args.large_share:.0%} '
+          f'по {args.large_size // 1024} КБ, сжатие {args.method}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('plain', 'compressed'):
+            result = run(
+                mode, os.path.join(tmp, f'{mode}.sqlite3'), texts,
+                args.method,
+            )
+            print(f"{mode:>10}: база {result['size_kb']:10.0f} КБ, "
+                  f"запись {result['write_ms']:8.1f} мс, "
+                  f"чтение заголовков {result['read_titles_ms']:7.1f} мс, "
+                  f"чтение текстов {result['read_texts_ms']:7.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
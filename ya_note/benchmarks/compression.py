@@ -0,0 +1,102 @@
+"""
+Время сжатия и размер страниц YaNote при разных кодировках и уровнях.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.compression --notes 2000 --repeats 20
+
+Страницы рендерятся настоящими шаблонами на временной базе: список
+заметок автора и страница заметки. Выгрузка в JSON Lines сжимается
+по частям, как это делает CompressionMiddleware, с досылкой данных
+после каждой части.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import django
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 5, 9, 11)}
+
+
+def render_pages(path, notes):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    author = get_user_model().objects.create(username='Автор')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст заметки ' * 50,
+             slug=f'note-{index}', author=author)
+        for index in range(notes)
+    )
+    client = Client()
+    client.force_login(author)
+    return {
+        'list': [client.get(reverse('notes:list')).content],
+        'detail': [client.get(
+            reverse('notes:detail', args=('note-0',))
+        ).content],
+        'export stream': list(
+            client.get(reverse('notes:export')).streaming_content
+        ),
+    }
+
+
+def compress(encoder_class, chunks):
+    from yacommon.middleware import compress_stream
+
+    if len(chunks) == 1:
+        encoder = encoder_class()
+        return encoder.compress(chunks[0]) + encoder.finish()
+    return b''.join(compress_stream(chunks, encoder_class()))
+
+
+def measure(encoder_class, chunks, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        size = len(compress(encoder_class, chunks))
+    return size, (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    from yacommon.middleware import ENCODERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = render_pages(
+            os.path.join(tmp, 'bench.sqlite3'), args.notes
+        )
+    for page, chunks in pages.items():
+        size = sum(map(len, chunks))
+        print(f'{page}: {size / 1024:.1f} КБ, частей: {len(chunks)}')
+        for encoder_class in ENCODERS:
+            for level in LEVELS[encoder_class.name]:
+                settings.COMPRESSION_GZIP_LEVEL = level
+                settings.COMPRESSION_BROTLI_QUALITY = level
+                compressed, ms = measure(encoder_class, chunks, args.repeats)
+                print(f'  {encoder_class.name:>4} {level:>2}: '
+                      f'{compressed / 1024:8.1f} КБ '
+                      f'({compressed / size:6.1%}), {ms:7.2f} мс')
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    django.setup()
+    main()
@@ -0,0 +1,65 @@
+"""
+Сравнение notes.slugs.slugify с pytils.translit.slugify.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.slugify --titles 20000 --unique 2000
+"""
+import argparse
+import random
+import timeit
+
+from pytils.translit import slugify as pytils_slugify
+
+from notes import slugs
+
+WORDS = (
+    'Заметка', 'о', 'встрече', 'с', 'командой', 'План', 'на', 'неделю',
+    'Список', 'покупок', 'Идеи', 'для', 'проекта', 'Ёлка', '&', 'Щука',
+    '№5', '«Черновик»', 'notes', '2024',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--unique', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    unique = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(2, 8)))
+        for _ in range(args.unique)
+    ]
+    # Массовый импорт: заголовки повторяются.
+    titles = rng.choices(unique, k=args.titles)
+
+    def run_pytils():
+        for title in titles:
+            pytils_slugify(title)
+
+    def run_table():
+        for title in titles:
+            slugs.slugify.__wrapped__(title)
+
+    def run_cached():
+        slugs.slugify.cache_clear()
+        for title in titles:
+            slugs.slugify(title)
+
+    assert all(pytils_slugify(title) == slugs.slugify(title)
+               for title in unique)
+    results = {
+        'pytils': timeit.timeit(run_pytils, number=1),
+        'таблица': timeit.timeit(run_table, number=1),
+        'таблица + LRU': timeit.timeit(run_cached, number=1),
+    }
+    print(f'Заголовков: {args.titles}, различных: {args.unique}')
+    for name, seconds in results.items():
+        per_title = seconds / args.titles * 1e6
+        speedup = results['pytils'] / seconds
+        print(f'{name:<14} {per_title:8.2f} мкс/заголовок  {speedup:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
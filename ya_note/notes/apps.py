@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .search import restore_triggers
+        from .sqlite import setup_connection
+        connection_created.connect(
+            setup_connection, dispatch_uid='notes.sqlite'
+        )
+        post_migrate.connect(
+            restore_triggers, sender=self, dispatch_uid='notes.search'
+        )
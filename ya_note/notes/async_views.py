@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from yacommon.tracing import trace_thread
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """
+    Общий пул потоков для работы с БД из асинхронных представлений.
+
+    Размер пула задаёт NOTES_DB_THREADS: одновременно к базе обращается
+    не больше этого числа запросов, остальные ждут в очереди пула.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.NOTES_DB_THREADS,
+                    thread_name_prefix='notes-db',
+                )
+    return _executor
+
+
+def _call_in_request_scope(func, *args, **kwargs):
+    # Потоки пула живут долго, поэтому соединения с БД обслуживаем
+    # так же, как Django делает это в начале и в конце запроса.
+    close_old_connections()
+    # Контекст запроса передан из run_in_db_thread: запросы к БД
+    # из потока пула попадают в трассировку этого запроса.
+    trace_thread()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле потоков для БД."""
+    loop = asyncio.get_running_loop()
+    # run_in_executor не переносит переменные контекста в поток пула.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_db_executor(),
+        context.run,
+        functools.partial(_call_in_request_scope, func, *args, **kwargs),
+    )
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        # Шаблон тоже обращается к БД: рендерим его в том же потоке.
+        response = response.render()
+    return response
+
+
+def as_async_view(view_class, **initkwargs):
+    """
+    Асинхронное представление из синхронного CBV.
+
+    Вся работа с ORM и рендеринг шаблона выполняются в ограниченном
+    пуле потоков, а не в отдельном потоке на каждый запрос.
+    """
+    view = view_class.as_view(**initkwargs)
+
+    async def async_view(request, *args, **kwargs):
+        return await run_in_db_thread(_render, view, request, *args, **kwargs)
+
+    functools.update_wrapper(async_view, view)
+    return async_view
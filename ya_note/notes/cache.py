@@ -0,0 +1,108 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+GENERATION_KEY = 'notes:generation:{author_id}'
+PAGE_KEY = 'notes:page:{author_id}:{generation}:{digest}'
+STATS_KEY = 'notes:stats:{outcome}'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def initial_generation():
+    """
+    Начальное поколение — текущее время в наносекундах.
+
+    Если ключ поколения вытеснен из кеша, новое значение окажется
+    больше всех прежних, и старые страницы не будут найдены.
+    """
+    return time.time_ns()
+
+
+def get_generation(author_id):
+    cache = get_cache()
+    key = GENERATION_KEY.format(author_id=author_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, initial_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(author_id):
+    """Сбрасывает все страницы автора за одну атомарную операцию."""
+    cache = get_cache()
+    key = GENERATION_KEY.format(author_id=author_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_generation(), timeout=None)
+
+
+def record(outcome):
+    cache = get_cache()
+    key = STATS_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """Число попаданий и промахов кеша страниц заметок."""
+    cache = get_cache()
+    stats = cache.get_many([STATS_KEY.format(outcome=HIT),
+                            STATS_KEY.format(outcome=MISS)])
+    return {
+        outcome: stats.get(STATS_KEY.format(outcome=outcome), 0)
+        for outcome in (HIT, MISS)
+    }
+
+
+def page_key(request):
+    user = request.user
+    digest = hashlib.md5(
+        f'{user.get_username()}:{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return PAGE_KEY.format(
+        author_id=user.pk,
+        generation=get_generation(user.pk),
+        digest=digest,
+    )
+
+
+class CachedPageMixin:
+    """
+    Кеширует отрисованную страницу под текущим поколением автора.
+
+    Любое изменение заметок автора увеличивает поколение, и все его
+    страницы сразу становятся недоступны; отдельные ключи не удаляются,
+    а устаревают по таймауту.
+    """
+    cache_header = 'X-Notes-Cache'
+
+    def get(self, request, *args, **kwargs):
+        key = page_key(request)
+        content = get_cache().get(key)
+        if content is not None:
+            record(HIT)
+            response = HttpResponse(content)
+            response[self.cache_header] = HIT
+            return response
+        record(MISS)
+        response = super().get(request, *args, **kwargs)
+        response[self.cache_header] = MISS
+        response.add_post_render_callback(
+            lambda rendered: get_cache().set(
+                key, rendered.content, settings.NOTES_CACHE_TIMEOUT
+            )
+        )
+        return response
@@ -0,0 +1,15 @@
+from django.core.checks import Tags, register
+from yacommon.checks import local_cache_errors
+
+# Настройки кешей, изменения в которых должны сразу видеть все
+# процессы сайта: сброс в одном процессе не доходит до LocMemCache
+# остальных, и они отдают устаревшие данные до истечения таймаута.
+SHARED_CACHE_SETTINGS = ('NOTES_CACHE_ALIAS', 'AUTH_USER_CACHE_ALIAS')
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Для manage.py check --deploy: такие кеши не в памяти процесса."""
+    return local_cache_errors(
+        SHARED_CACHE_SETTINGS, 'YANOTE_CACHE_LOCATION', 'notes.E001'
+    )
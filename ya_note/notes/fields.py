@@ -0,0 +1,108 @@
+import functools
+import lzma
+import zlib
+
+from django.db import models
+
+# Первый байт сжатого значения — способ сжатия.
+ZLIB = b'\x01'
+LZMA = b'\x02'
+METHODS = {'zlib': ZLIB, 'lzma': LZMA}
+# Значения короче порога (в байтах UTF-8) хранятся обычным текстом.
+COMPRESS_THRESHOLD = 16 * 1024
+# Функция SQL, возвращающая текст независимо от того, сжат он или нет;
+# регистрируется на каждом соединении с SQLite, см. notes.sqlite.
+TEXT_FUNCTION = 'notes_text'
+
+
+def compress(text, method='zlib'):
+    """Сжатое значение: байт-маркер и данные."""
+    data = text.encode()
+    if method == 'lzma':
+        return LZMA + lzma.compress(data, preset=6)
+    return ZLIB + zlib.compress(data, 6)
+
+
+def decompress(value):
+    """Текст из сжатого значения; обычный текст возвращается как есть."""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    value = bytes(value)
+    marker, data = value[:1], value[1:]
+    if marker == ZLIB:
+        return zlib.decompress(data).decode()
+    if marker == LZMA:
+        return lzma.decompress(data).decode()
+    raise ValueError(f'Неизвестный способ сжатия: {marker!r}.')
+
+
+@functools.lru_cache(maxsize=None)
+def decoded_lookup(lookup_class):
+    """
+    Вариант поиска, сравнивающий с текстом, а не с хранимым значением.
+
+    В SQLite столбец оборачивается функцией TEXT_FUNCTION, иначе
+    contains и другие поиски сравнивали бы со сжатыми байтами.
+    На других базах значения не сжимаются, и поиск остаётся прежним.
+    """
+    class DecodedLookup(lookup_class):
+
+        def process_lhs(self, compiler, connection, lhs=None):
+            sql, params = super().process_lhs(compiler, connection, lhs)
+            if connection.vendor == 'sqlite':
+                sql = f'{TEXT_FUNCTION}({sql})'
+            return sql, params
+
+    DecodedLookup.__name__ = f'Decoded{lookup_class.__name__}'
+    return DecodedLookup
+
+
+class CompressedTextField(models.TextField):
+    """
+    Текстовое поле, большие значения которого хранятся сжатыми.
+
+    Сжимаются значения длиннее threshold байт, и только в SQLite:
+    столбец остаётся текстовым, а SQLite допускает в нём BLOB.
+    Значение распаковывается при чтении из базы любым способом,
+    включая values() и values_list(); поиски по полю сравнивают
+    с распакованным текстом.
+    """
+
+    def __init__(self, *args, threshold=COMPRESS_THRESHOLD, method='zlib',
+                 **kwargs):
+        if method not in METHODS:
+            raise ValueError(f'Неизвестный способ сжатия: {method!r}.')
+        self.threshold = threshold
+        self.method = method
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != COMPRESS_THRESHOLD:
+            kwargs['threshold'] = self.threshold
+        if self.method != 'zlib':
+            kwargs['method'] = self.method
+        return name, path, args, kwargs
+
+    def get_db_prep_save(self, value, connection):
+        value = super().get_db_prep_save(value, connection)
+        if connection.vendor != 'sqlite' or not isinstance(value, str):
+            return value
+        size = len(value.encode())
+        if size <= self.threshold:
+            return value
+        compressed = compress(value, self.method)
+        # Несжимаемый текст оставляем как есть.
+        return compressed if len(compressed) < size else value
+
+    def from_db_value(self, value, expression, connection):
+        return decompress(value)
+
+    def to_python(self, value):
+        return super().to_python(decompress(value))
+
+    def get_lookup(self, lookup_name):
+        lookup = super().get_lookup(lookup_name)
+        if lookup is None or lookup_name == 'isnull':
+            return lookup
+        return decoded_lookup(lookup)
@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -16,14 +14,40 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подбирает сама модель при сохранении,
+        добавляя к нему суффикс при совпадении.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            return ''
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        # Уникальность slug уже проверена в clean_slug, других
+        # уникальных полей у заметки нет.
+        pass
+
+
+class ImportedNoteForm(forms.ModelForm):
+    """Проверка одной заметки при импорте."""
+
+    class Meta:
+        model = Note
+        fields = ('title', 'text', 'slug')
+
+    def validate_unique(self):
+        # Свободные slug подбираются сразу для всей порции заметок.
+        pass
+
+
+class ImportFileForm(forms.Form):
+    """Файл JSON Lines для импорта заметок."""
+    file = forms.FileField(label='Файл JSON Lines')
@@ -0,0 +1,50 @@
+import codecs
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from notes.transfer import IMPORT_BATCH_SIZE, import_notes
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файла JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def progress(self, report):
+        self.stdout.write(
+            f'Импортировано: {report.imported}, пропущено: '
+            f'{report.skipped}, {report.notes_per_second:.0f} заметок/с'
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get_by_natural_key(options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_notes(
+                    author,
+                    codecs.iterdecode(file, 'utf-8'),
+                    options['batch_size'],
+                    self.progress,
+                )
+        except (OSError, UnicodeDecodeError, IntegrityError) as error:
+            raise CommandError(f'Импорт не выполнен: {error}')
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {report.imported} заметок за {report.seconds:.2f} с '
+            f'({report.notes_per_second:.0f} заметок/с), '
+            f'пропущено строк: {report.skipped}.'
+        ))
@@ -0,0 +1,72 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from notes.seeding import SeedOptions, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками '
+        'для нагрузочного тестирования. При одинаковых параметрах '
+        'и --seed результат одинаков.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedOptions()
+        parser.add_argument('--users', type=int, default=defaults.users)
+        parser.add_argument(
+            '--notes-per-author', type=float,
+            default=defaults.notes_per_author,
+            help='среднее число заметок пользователя',
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=defaults.alpha,
+            help='показатель степенного закона для числа заметок, > 1; '
+                 'без него у всех пользователей поровну',
+        )
+        parser.add_argument(
+            '--max-notes', type=int, default=defaults.max_notes,
+            help='наибольшее число заметок одного пользователя',
+        )
+        parser.add_argument(
+            '--text-words', type=int, nargs=2, default=defaults.text_words,
+            metavar=('MIN', 'MAX'), help='длина текста заметки в словах',
+        )
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=defaults.until,
+            help='дата регистрации пользователей отсчитывается от неё, '
+                 'ГГГГ-ММ-ДД; по умолчанию сегодня',
+        )
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='процессов, которые строят порции заметок',
+        )
+
+    def progress(self, report):
+        self.stdout.write(f'Заметок: {report.notes}')
+
+    def handle(self, *args, **options):
+        if options['alpha'] is not None and options['alpha'] <= 1:
+            raise CommandError('--alpha должен быть больше 1.')
+        seed_options = SeedOptions(
+            users=options['users'],
+            notes_per_author=options['notes_per_author'],
+            alpha=options['alpha'],
+            max_notes=options['max_notes'],
+            text_words=tuple(options['text_words']),
+            until=options['until'],
+            seed=options['seed'],
+        )
+        try:
+            report = seed(seed_options, options['workers'], self.progress)
+        except IntegrityError as error:
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже есть: {error}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {report.seconds:.1f} с: пользователей '
+            f'{report.users}, заметок {report.notes}.'
+        ))
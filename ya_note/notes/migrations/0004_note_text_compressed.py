@@ -0,0 +1,166 @@
+from django.db import migrations
+
+import notes.fields
+
+BATCH_SIZE = 500
+# SQL миграций не зависит от кода приложения: индекс, каким его
+# оставила 0003_note_fts, описан здесь же.
+FTS_0003_CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+REBUILD_SQL = "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')"
+
+# Индекс теперь читает содержимое через представление, которое
+# распаковывает сжатый текст; триггеры тоже передают в индекс текст.
+CREATE_SQL = (
+    """
+    CREATE VIEW notes_note_fts_content AS
+    SELECT id, title, notes_text(text) AS text FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text,
+        content='notes_note_fts_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+    'DROP VIEW IF EXISTS notes_note_fts_content',
+)
+
+
+def register_text_function(connection):
+    connection.ensure_connection()
+    connection.connection.create_function(
+        'notes_text', 1, notes.fields.decompress, deterministic=True
+    )
+
+
+def rewrite_texts(schema_editor, convert):
+    """
+    Переписывает тексты заметок порциями по возрастанию id.
+
+    convert возвращает тот же объект, если текст менять не нужно.
+    """
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                'SELECT id, text FROM notes_note WHERE id > %s '
+                'ORDER BY id LIMIT %s', (last_id, BATCH_SIZE)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            changed = [
+                (value, pk) for pk, text in rows
+                if (value := convert(text)) is not text
+            ]
+            if changed:
+                cursor.executemany(
+                    'UPDATE notes_note SET text = %s WHERE id = %s', changed
+                )
+            last_id = rows[-1][0]
+
+
+def compress_texts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    connection = schema_editor.connection
+    register_text_function(connection)
+    field = apps.get_model('notes', 'Note')._meta.get_field('text')
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+    rewrite_texts(
+        schema_editor, lambda text: field.get_db_prep_save(text, connection)
+    )
+    for sql in (*CREATE_SQL, REBUILD_SQL):
+        schema_editor.execute(sql)
+
+
+def decompress_texts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+    rewrite_texts(schema_editor, notes.fields.decompress)
+    for sql in (*FTS_0003_CREATE_SQL, REBUILD_SQL):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_fts'),
+    ]
+
+    operations = [
+        # Тип столбца не меняется, поэтому таблицу не пересоздаём:
+        # иначе SQLite потерял бы триггеры индекса поиска.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='note',
+                    name='text',
+                    field=notes.fields.CompressedTextField(
+                        help_text='Добавьте подробностей',
+                        verbose_name='Текст',
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+    ]
@@ -0,0 +1,125 @@
+from django.db import migrations
+
+import notes.fields
+
+# Индекс без содержимого: FTS5 хранит только индекс и ни на что
+# в схеме не ссылается. Представление над notes_note из 0004 мешало
+# SQLite пересоздавать таблицу в следующих миграциях. Текст в индекс
+# передают триггеры, распаковывая его функцией notes_text.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+)
+# 'rebuild' у индекса без содержимого нет: очищаем и заполняем заново.
+REBUILD_SQL = (
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('delete-all')",
+    """
+    INSERT INTO notes_note_fts(rowid, title, text)
+    SELECT id, title, notes_text(text) FROM notes_note
+    """,
+)
+
+
+# Индекс, каким его оставила 0004_note_text_compressed.
+VIEW_CREATE_SQL = (
+    """
+    CREATE VIEW notes_note_fts_content AS
+    SELECT id, title, notes_text(text) AS text FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text,
+        content='notes_note_fts_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, notes_text(old.text));
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, notes_text(new.text));
+    END
+    """,
+)
+VIEW_REBUILD_SQL = (
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+    'DROP VIEW IF EXISTS notes_note_fts_content',
+)
+
+
+def create_contentless(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    connection = schema_editor.connection
+    connection.ensure_connection()
+    connection.connection.create_function(
+        'notes_text', 1, notes.fields.decompress, deterministic=True
+    )
+    for sql in (*DROP_SQL, *CREATE_SQL, *REBUILD_SQL):
+        schema_editor.execute(sql)
+
+
+def restore_view(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in (*DROP_SQL, *VIEW_CREATE_SQL, *VIEW_REBUILD_SQL):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_text_compressed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_contentless, restore_view),
+    ]
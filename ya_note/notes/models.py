@@ -1,7 +1,11 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import allocate_slug, slugify
+
+# Сколько раз подбирать slug заново, если его успел занять другой запрос.
+SLUG_ATTEMPTS = 10
 
 
 class Note(models.Model):
@@ -11,7 +15,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -28,11 +32,34 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'), name='note_author_id_idx'
+            ),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        # Сначала пробуем slug из заголовка без лишних запросов,
+        # при конфликте по уникальному индексу подбираем суффикс.
+        others = type(self).objects.exclude(pk=self.pk)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify(self.title)[:max_slug_length]
+        candidate = base
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = candidate
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Повторяем, только если конфликт именно по slug.
+                if (attempt == SLUG_ATTEMPTS - 1
+                        or not others.filter(slug=self.slug).exists()):
+                    self.slug = ''
+                    raise
+            candidate = allocate_slug(others, base, max_slug_length)
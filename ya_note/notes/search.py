@@ -0,0 +1,147 @@
+import logging
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+
+from .fields import TEXT_FUNCTION
+from .models import Note
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'notes_note_fts'
+# Заголовок при ранжировании весит больше текста.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SEARCH_LIMIT = 50
+
+TERM = re.compile(r'\w+')
+
+# Индекс без содержимого и триггеры, которые передают в него текст
+# заметок, распаковывая его функцией TEXT_FUNCTION. Схему создаёт
+# миграция FTS_MIGRATION с копией этого SQL: при изменении схемы
+# индекса нужна новая миграция.
+FTS_MIGRATION = ('notes', '0005_note_fts_contentless')
+FTS_TRIGGERS = {
+    'notes_note_fts_insert', 'notes_note_fts_delete', 'notes_note_fts_update',
+}
+CREATE_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, text,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, {TEXT_FUNCTION}(new.text));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, {TEXT_FUNCTION}(old.text));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, {TEXT_FUNCTION}(old.text));
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, {TEXT_FUNCTION}(new.text));
+    END
+    """,
+)
+# 'rebuild' у индекса без содержимого нет: очищаем и заполняем заново.
+REBUILD_SQL = (
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, text)
+    SELECT id, title, {TEXT_FUNCTION}(text) FROM notes_note
+    """,
+)
+SEARCH_SQL = f"""
+    SELECT notes_note.id, notes_note.title, notes_note.slug
+    FROM {FTS_TABLE}
+    JOIN notes_note ON notes_note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND notes_note.author_id = %s
+    ORDER BY bm25({FTS_TABLE}, %s, %s)
+    LIMIT %s
+"""
+
+
+def fts_query(query):
+    """
+    Запрос пользователя в синтаксисе FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в тексте
+    не ломали запрос, и ищется по префиксу; слова объединяются через И.
+    """
+    return ' '.join(f'"{term}"*' for term in TERM.findall(query))
+
+
+def search_notes(author, query, limit=SEARCH_LIMIT):
+    """Заметки автора, подходящие под запрос, от наиболее релевантных."""
+    match = fts_query(query)
+    if not match:
+        return []
+    if connection.vendor != 'sqlite':
+        # FTS5 есть только в SQLite.
+        return like_search(author, query, limit)
+    return list(Note.objects.raw(
+        SEARCH_SQL, (match, author.pk, TITLE_WEIGHT, TEXT_WEIGHT, limit)
+    ))
+
+
+def like_search(author, query, limit=SEARCH_LIMIT):
+    """
+    Поиск подстроки без индекса, для баз без FTS5.
+
+    Поиск по тексту сравнивает с распакованным текстом, поэтому
+    сжатые заметки тоже находятся, см. CompressedTextField.
+    """
+    return list(Note.objects.filter(
+        Q(title__icontains=query) | Q(text__icontains=query),
+        author=author,
+    ).only('id', 'title', 'slug')[:limit])
+
+
+def rebuild_index():
+    """Заново строит индекс по всем заметкам."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+
+
+def restore_triggers(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Обработчик post_migrate: возвращает триггеры индекса.
+
+    SQLite молча удаляет триггеры, когда миграция пересоздаёт таблицу
+    notes_note. Тогда триггеры создаются заново, а индекс строится
+    по всем заметкам, включая изменённые самой миграцией.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    if FTS_MIGRATION not in MigrationRecorder(db).applied_migrations():
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        if FTS_TRIGGERS <= {name for name, in cursor.fetchall()}:
+            return
+    with transaction.atomic(using=using), db.cursor() as cursor:
+        for sql in (*CREATE_SQL, *REBUILD_SQL):
+            cursor.execute(sql)
+    logger.warning(
+        'Триггеры индекса поиска заметок восстановлены, '
+        'индекс построен заново.'
+    )
@@ -0,0 +1,208 @@
+"""
+Синтетические пользователи и заметки для нагрузочного тестирования.
+
+Результат зависит только от параметров SeedOptions: каждая порция
+из CHUNK_SIZE заметок получает свой генератор случайных чисел,
+а id всех строк вычисляются заранее. Поэтому число процессов
+и размер пачек bulk_create на результат не влияют.
+
+Процессы пула только строят порции: SQLite допускает одного
+писателя, и все bulk_create выполняет основной процесс.
+"""
+import os
+import random
+import time
+from bisect import bisect_right
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from multiprocessing import get_context
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Note
+from .slugs import SUFFIX_RESERVE, slugify
+
+# Заметок и пользователей в одной порции; от них зависит результат.
+CHUNK_SIZE = 1000
+BATCH_SIZE = 5000
+# Пароль, с которым нельзя войти: хешировать миллионы паролей незачем.
+UNUSABLE_PASSWORD = '!seed'
+# За сколько дней до until зарегистрированы пользователи.
+JOINED_DAYS = 3650
+WORDS = (
+    'покупки', 'молоко', 'хлеб', 'встреча', 'звонок', 'отчёт', 'проект',
+    'идея', 'книга', 'фильм', 'рецепт', 'пирог', 'борщ', 'отпуск', 'билеты',
+    'поезд', 'самолёт', 'гостиница', 'подарок', 'день', 'рождения', 'мама',
+    'папа', 'бабушка', 'дача', 'огород', 'ёлка', 'щётка', 'счёт', 'оплата',
+    'налоги', 'врач', 'аптека', 'тренировка', 'бег', 'йога', 'английский',
+    'экзамен', 'курсы', 'ремонт', 'обои', 'кухня', 'список', 'дел', 'план',
+    'неделя', 'понедельник', 'пятница', 'завтра', 'срочно', 'важно',
+    'черновик', 'письмо', 'жалоба', 'ответ', 'пароль', 'вопрос', 'цитата',
+)
+# Знаки в заголовках, которые slugify удаляет или заменяет.
+TITLE_ENDINGS = ('', '', '', '!', '?', '…', ' — итоги', ' & планы', ' №2')
+
+
+@dataclass
+class SeedOptions:
+    users: int = 100
+    # Среднее число заметок автора. При alpha заметки распределены
+    # по степенному закону, без него у всех авторов поровну.
+    notes_per_author: float = 10.0
+    alpha: float = None
+    max_notes: int = 100_000
+    # Длина текста заметки в словах, от и до.
+    text_words: tuple = (5, 500)
+    until: date = field(default_factory=date.today)
+    seed: int = 0
+
+
+@dataclass
+class Chunk:
+    index: int
+    first_note_id: int
+    author_ids: list
+
+
+@dataclass
+class SeedReport:
+    users: int = 0
+    notes: int = 0
+    seconds: float = 0.0
+
+
+def chunk_random(options, kind, index=0):
+    return random.Random(f'{options.seed}:{kind}:{index}')
+
+
+def power_law(rng, mean, alpha, cap):
+    """Целое со средним около mean и распределением Парето."""
+    scale = mean * (alpha - 1) / alpha
+    return min(cap, int(scale * rng.paretovariate(alpha)))
+
+
+def words(rng, bounds):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(*bounds)))
+
+
+def title(rng, max_length):
+    text = words(rng, (1, 5)).capitalize() + rng.choice(TITLE_ENDINGS)
+    return text[:max_length].rstrip()
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def create_users(options):
+    User = get_user_model()
+    first_id = next_id(User)
+    joined = timezone.make_aware(datetime.combine(
+        options.until - timedelta(days=JOINED_DAYS), datetime.min.time()
+    ))
+    User.objects.bulk_create(
+        (
+            User(id=first_id + index, username=f'seed{options.seed}_{index}',
+                 password=UNUSABLE_PASSWORD, date_joined=joined)
+            for index in range(options.users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return first_id
+
+
+def notes_per_author(options):
+    """Число заметок каждого пользователя по порядку id."""
+    if options.alpha is None:
+        return [round(options.notes_per_author)] * options.users
+    counts = []
+    for index, start in enumerate(range(0, options.users, CHUNK_SIZE)):
+        rng = chunk_random(options, 'counts', index)
+        counts.extend(
+            power_law(
+                rng, options.notes_per_author, options.alpha,
+                options.max_notes,
+            )
+            for _ in range(min(CHUNK_SIZE, options.users - start))
+        )
+    return counts
+
+
+def plan(options, first_user_id):
+    """Порции заметок с заранее вычисленными id заметок и авторов."""
+    ends = list(accumulate(notes_per_author(options)))
+    total = ends[-1] if ends else 0
+    first_note_id = next_id(Note)
+    return [
+        Chunk(index, first_note_id + start, [
+            first_user_id + bisect_right(ends, position)
+            for position in range(start, min(start + CHUNK_SIZE, total))
+        ])
+        for index, start in enumerate(range(0, total, CHUNK_SIZE))
+    ]
+
+
+def build_chunk(chunk, options):
+    rng = chunk_random(options, 'rows', chunk.index)
+    max_title = Note._meta.get_field('title').max_length
+    max_slug = Note._meta.get_field('slug').max_length
+    notes = []
+    for offset, author_id in enumerate(chunk.author_ids):
+        note_id = chunk.first_note_id + offset
+        note_title = title(rng, max_title)
+        # id в суффиксе делает slug уникальным без запросов к базе.
+        slug = slugify(note_title)[:max_slug - SUFFIX_RESERVE]
+        notes.append(Note(
+            id=note_id, title=note_title,
+            text=words(rng, options.text_words),
+            slug=f'{slug}-{note_id}', author_id=author_id,
+        ))
+    return notes
+
+
+def write_chunk(notes):
+    """Сохраняет одну порцию; возвращает число строк."""
+    with transaction.atomic():
+        Note.objects.bulk_create(notes, batch_size=BATCH_SIZE)
+    return len(notes)
+
+
+def _init_worker(settings_module):
+    # Под spawn процесс начинается без настроенного Django.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _build_chunk(args):
+    return build_chunk(*args)
+
+
+def seed(options, workers=1, progress=None):
+    """Создаёт пользователей и их заметки по options."""
+    started = time.perf_counter()
+    report = SeedReport(users=options.users)
+    with transaction.atomic():
+        first_user_id = create_users(options)
+    tasks = [(chunk, options) for chunk in plan(options, first_user_id)]
+    with ExitStack() as stack:
+        chunks = map(_build_chunk, tasks)
+        if workers > 1:
+            # Соединение с базой не должно достаться дочерним процессам.
+            connections.close_all()
+            pool = stack.enter_context(get_context().Pool(
+                workers, _init_worker,
+                (os.environ['DJANGO_SETTINGS_MODULE'],),
+            ))
+            chunks = pool.imap_unordered(_build_chunk, tasks)
+        for notes in chunks:
+            report.notes += write_chunk(notes)
+            if progress:
+                progress(report)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from yacommon.auth import invalidate_user
+
+from .cache import bump_generation
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_author_pages(sender, instance, **kwargs):
+    bump_generation(instance.author_id)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    # Новый пользователь может получить id и имя пользователя, строки
+    # которого исчезли без сигналов, например при откате транзакции:
+    # его страницы из кеша не должны достаться новому владельцу.
+    if kwargs.get('created', True):
+        bump_generation(instance.pk)
@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache, reduce
+from operator import or_
+
+from django.db.models import Q
+from django.db.models.functions import Length
+from pytils.translit import ALPHABET, TRANSTABLE
+
+# Запас длины под суффикс вида -1234567.
+SUFFIX_RESERVE = 8
+SLUGIFY_CACHE_SIZE = 4096
+
+AMPERSAND = re.compile(r'&amp;|&')
+HYPHENS = re.compile(r'[-\s]+')
+NOT_SLUG = re.compile(r'[^\w\s-]')
+
+
+class SlugTable(dict):
+    """Таблица для str.translate: символы не из алфавита удаляются."""
+
+    def __missing__(self, key):
+        return None
+
+
+def build_slug_table():
+    """
+    Таблица, за один проход повторяющая фильтр, транслитерацию
+    и чистку pytils.translit.slugify.
+
+    pytils заменяет символы по очереди через str.replace, и для
+    каждого символа срабатывает первая подходящая пара TRANSTABLE:
+    результаты замен состоят из ASCII и дальше уже не меняются.
+    """
+    translit = {}
+    for symbol_in, symbol_out in TRANSTABLE:
+        translit.setdefault(symbol_in, symbol_out)
+    table = SlugTable()
+    for symbol in ALPHABET:
+        if len(symbol) == 1:
+            out = NOT_SLUG.sub('', translit.get(symbol, symbol)).lower()
+            table[ord(symbol)] = out
+    return table
+
+
+SLUG_TABLE = build_slug_table()
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify(in_string):
+    """
+    Замена pytils.translit.slugify с тем же результатом.
+
+    Вместо посимвольной обработки в Python — одна str.translate
+    по заранее построенной таблице; повторяющиеся заголовки
+    берутся из LRU-кеша.
+    """
+    text = str(in_string).lower()
+    text = HYPHENS.sub('-', AMPERSAND.sub(' and ', text))
+    return text.translate(SLUG_TABLE).strip()
+
+
+def allocate_slug(queryset, base, max_length):
+    """
+    Следующий свободный вариант slug с суффиксом: base-2, base-3 и т.д.
+
+    Занятые суффиксы берутся одним запросом по диапазону уникального
+    индекса slug; самый длинный, а при равной длине наибольший суффикс
+    и есть максимальный номер. queryset должен исключать сохраняемую
+    запись.
+    """
+    prefix = base[:max_length - SUFFIX_RESERVE] + '-'
+    taken = queryset.filter(
+        slug__gte=prefix, slug__lt=prefix + chr(0x10FFFF)
+    ).order_by(
+        Length('slug').desc(), '-slug'
+    ).values_list('slug', flat=True)
+    for slug in taken.iterator():
+        suffix = slug[len(prefix):]
+        if suffix.isdigit():
+            return f'{prefix}{int(suffix) + 1}'
+    return f'{prefix}2'
+
+
+def _suffix_range(prefix):
+    return Q(slug__gte=prefix, slug__lt=prefix + chr(0x10FFFF))
+
+
+def allocate_slugs(queryset, bases, max_length):
+    """
+    Свободные slug для целой порции заметок за два запроса.
+
+    Первый запрос находит уже занятые slug из порции, второй — занятые
+    суффиксы всех конфликтующих вариантов сразу. Совпадения внутри
+    самой порции тоже получают суффиксы.
+    """
+    slugs = [base[:max_length] for base in bases]
+    taken = set(queryset.filter(
+        slug__in=set(slugs)
+    ).values_list('slug', flat=True))
+    used = set()
+    conflicts = []
+    for index, slug in enumerate(slugs):
+        if slug in taken or slug in used:
+            conflicts.append(index)
+        else:
+            used.add(slug)
+    if not conflicts:
+        return slugs
+    prefixes = {
+        slugs[index][:max_length - SUFFIX_RESERVE] + '-'
+        for index in conflicts
+    }
+    next_number = dict.fromkeys(prefixes, 2)
+    suffixed = queryset.filter(
+        reduce(or_, map(_suffix_range, prefixes))
+    ).values_list('slug', flat=True)
+    for slug in suffixed.iterator():
+        for prefix in prefixes:
+            suffix = slug[len(prefix):]
+            if slug.startswith(prefix) and suffix.isdigit():
+                next_number[prefix] = max(
+                    next_number[prefix], int(suffix) + 1
+                )
+    for index in conflicts:
+        prefix = slugs[index][:max_length - SUFFIX_RESERVE] + '-'
+        while f'{prefix}{next_number[prefix]}' in used:
+            next_number[prefix] += 1
+        slugs[index] = f'{prefix}{next_number[prefix]}'
+        used.add(slugs[index])
+        next_number[prefix] += 1
+    return slugs
@@ -0,0 +1,18 @@
+from yacommon import sqlite
+
+from .fields import TEXT_FUNCTION, decompress
+
+
+def register_functions(sqlite_connection):
+    # TEXT_FUNCTION нужна индексу полнотекстового поиска и поискам
+    # по CompressedTextField.
+    sqlite_connection.create_function(
+        TEXT_FUNCTION, 1, decompress, deterministic=True
+    )
+
+
+def setup_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA и функции заметок."""
+    sqlite.setup_connection(sender, connection, **kwargs)
+    if connection.vendor == 'sqlite':
+        register_functions(connection.connection)
@@ -0,0 +1,19 @@
+import pytest
+from django.test.utils import teardown_databases
+
+# Наборы регистрируются при импорте, до сборки снимков.
+import notes.tests.datasets  # noqa: F401
+from yacommon.snapshots import build_datasets, setup_test_databases
+
+
+# Тестовая база создаётся из сохранённой схемы, наборы данных строятся
+# один раз и в тестах восстанавливаются из снимков.
+@pytest.fixture(scope='session')
+def django_db_setup(request, django_test_environment, django_db_blocker):
+    verbosity = request.config.option.verbose
+    with django_db_blocker.unblock():
+        config = setup_test_databases(verbosity)
+        build_datasets()
+    yield
+    with django_db_blocker.unblock():
+        teardown_databases(config, verbosity=verbosity)
@@ -0,0 +1,45 @@
+"""Наборы данных для тестов YaNote, см. yacommon.snapshots."""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from notes.models import Note
+from yacommon.snapshots import Restorer, dataset
+
+User = get_user_model()
+
+
+@dataset('note')
+def build_note():
+    # Автор с одной заметкой и пользователь без заметок.
+    author = User.objects.create(username='Автор')
+    return {
+        'author': author,
+        'reader': User.objects.create(username='Читатель'),
+        'note': Note.objects.create(
+            title='Заголовок заметки',
+            text='Просто текст заметки.',
+            slug='Svoi',
+            author=author,
+        ),
+    }
+
+
+class DatasetTestCase(TestCase):
+    """
+    TestCase, в котором наборы из datasets восстанавливаются один раз
+    на класс, а их объекты становятся атрибутами класса.
+    """
+    datasets = ()
+
+    @classmethod
+    def setUpTestData(cls):
+        restorer = Restorer()
+        for name in cls.datasets:
+            for attr, value in restorer.restore(name).items():
+                setattr(cls, attr, value)
+
+    def setUp(self):
+        super().setUp()
+        # Кеш страниц не откатывается вместе с транзакцией теста.
+        for cache in caches.all():
+            cache.clear()
@@ -1,26 +1,33 @@
+import asyncio
+import gzip
+from http import HTTPStatus
+from importlib import import_module
+
 # Импортируем функцию для получения модели пользователя.
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management.sql import emit_post_migrate_signal
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 # Импортируем функцию reverse(), она понадобится для получения адреса страницы.
 from django.urls import reverse
+from notes.cache import HIT, MISS, cache_stats, get_cache
 from notes.models import Note
+from notes import search
+from notes.search import FTS_TRIGGERS, search_notes
+from notes.tests.datasets import DatasetTestCase
+from yacommon.middleware import CompressionMiddleware, SQLTraceMiddleware
+from yacommon.tracing import install_trace
 
 User = get_user_model()
 
 
 # Класс для проверки отдельной страницы
-class TestDetailPage(TestCase):
-
-    @classmethod
-    def setUpTestData(cls):
-        cls.author = User.objects.create(username='Автор')
-        cls.reader = User.objects.create(username='Другой Автор')
-        cls.note = Note.objects.create(
-            title='Заголовок заметки',
-            text='Просто текст заметки.',
-            slug='Svoi',
-            author=cls.author,
-        )
+class TestDetailPage(DatasetTestCase):
+    # Автор, его заметка и читатель без заметок.
+    datasets = ('note',)
 
     # п.1 Отдельная заметка передаётся на страницу со списком заметок
     # в списке object_list, в словаре context
@@ -56,3 +63,298 @@ class TestDetailPage(TestCase):
                 response = self.client.get(url)
                 # проверка
                 self.assertIn('form', response.context)
+
+    # п.4 Список заметок выводится постранично по курсору,
+    # текст заметок при этом не загружается.
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_notes_list_pagination(self):
+        for index in range(2):
+            Note.objects.create(
+                title=f'Ещё заметка {index}',
+                text='Текст',
+                author=self.author,
+            )
+        self.client.force_login(self.author)
+        url = reverse('notes:list')
+        first_page = self.client.get(url).context
+        self.assertEqual(len(first_page['object_list']), 2)
+        self.assertIn(
+            'text', first_page['object_list'][0].get_deferred_fields()
+        )
+        second_page = self.client.get(
+            url, {'cursor': first_page['next_cursor']}
+        ).context
+        self.assertEqual(len(second_page['object_list']), 1)
+        self.assertIsNone(second_page['next_cursor'])
+        ids = [
+            note.id for note in (
+                *first_page['object_list'], *second_page['object_list']
+            )
+        ]
+        self.assertEqual(ids, sorted(ids))
+
+
+# Поиск по заметкам.
+class TestNoteSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.in_title = Note.objects.create(
+            title='Рецепт пирога', text='Мука и яблоки.', author=cls.author
+        )
+        cls.in_text = Note.objects.create(
+            title='Покупки', text='Купить яблоки для пирога.',
+            author=cls.author
+        )
+        cls.other = Note.objects.create(
+            title='Пирог', text='Чужая заметка.', author=cls.reader
+        )
+        cls.url = reverse('notes:search')
+
+    def search(self, query):
+        response = self.client.get(self.url, {'q': query})
+        return list(response.context['object_list'])
+
+    # п.5 Поиск находит только заметки автора, совпадения в заголовке
+    # выше совпадений в тексте, слова ищутся по началу.
+    def test_search_scoped_and_ranked(self):
+        self.client.force_login(self.author)
+        self.assertEqual(self.search('пирог'), [self.in_title, self.in_text])
+        self.assertEqual(self.search('купить ябл'), [self.in_text])
+        # Операторы FTS5 в запросе не ломают поиск.
+        self.assertEqual(self.search('"пирог" OR *'), [])
+
+    # п.6 Индекс обновляется при изменении и удалении заметок.
+    def test_search_index_follows_changes(self):
+        self.client.force_login(self.author)
+        self.in_text.text = 'Купить молоко.'
+        self.in_text.save()
+        self.assertEqual(self.search('пирог'), [self.in_title])
+        self.assertEqual(self.search('молоко'), [self.in_text])
+        self.in_title.delete()
+        self.assertEqual(self.search('пирог'), [])
+
+
+def rebuild_note_table():
+    """Пересоздаёт notes_note так же, как AlterField в миграции SQLite."""
+    field = Note._meta.get_field('title')
+    wider = field.clone()
+    wider.set_attributes_from_name(field.name)
+    wider.model = Note
+    wider.max_length = field.max_length + 1
+    with connection.schema_editor() as editor:
+        editor.alter_field(Note, field, wider)
+        editor.alter_field(Note, wider, field)
+
+
+# Индекс поиска и изменения схемы в следующих миграциях.
+class TestSearchSchemaChanges(TransactionTestCase):
+
+    def tearDown(self):
+        # Пересоздание таблицы удаляет её триггеры.
+        if self.triggers() != FTS_TRIGGERS:
+            with self.assertLogs('notes.search', 'WARNING'):
+                emit_post_migrate_signal(0, False, connection.alias)
+        super().tearDown()
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            return {name for name, in cursor.fetchall()} & FTS_TRIGGERS
+
+    # п.6.1 Таблицу заметок можно пересоздать: индекс поиска
+    # не зависит от неё через представление.
+    def test_note_table_can_be_rebuilt(self):
+        author = User.objects.create(username='Мигрирующий')
+        note = Note.objects.create(
+            title='Заметка до миграции', text='Текст', author=author
+        )
+        rebuild_note_table()
+        self.assertEqual(Note.objects.get().title, note.title)
+        self.assertEqual(search_notes(author, 'миграции'), [note])
+
+    # п.6.2 После migrate триггеры, удалённые вместе с пересозданной
+    # таблицей, восстанавливаются, и новые заметки снова находятся.
+    def test_triggers_restored_after_migrate(self):
+        author = User.objects.create(username='Мигрирующий')
+        before = Note.objects.create(
+            title='Заметка до миграции', text='Текст', author=author
+        )
+        rebuild_note_table()
+        self.assertEqual(self.triggers(), set())
+        # Заметка, которую миграция добавила без триггеров.
+        during = Note.objects.create(
+            title='Заметка во время миграции', text='Текст', author=author
+        )
+        with self.assertLogs('notes.search', 'WARNING'):
+            emit_post_migrate_signal(0, False, connection.alias)
+        self.assertEqual(self.triggers(), FTS_TRIGGERS)
+        after = Note.objects.create(
+            title='Заметка после миграции', text='Текст', author=author
+        )
+        self.assertEqual(
+            set(search_notes(author, 'миграции')), {before, during, after}
+        )
+        self.assertEqual(search_notes(author, 'во время'), [during])
+
+    # п.6.3 Миграция создала индекс тем же SQL, которым его
+    # восстанавливает приложение.
+    def test_migration_sql_matches_search(self):
+        migration = import_module(
+            'notes.migrations.' + search.FTS_MIGRATION[1]
+        )
+        self.assertEqual(migration.CREATE_SQL, search.CREATE_SQL)
+        self.assertEqual(migration.REBUILD_SQL, search.REBUILD_SQL)
+
+
+# Кеш страниц заметок.
+class TestNotePageCache(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Кешированный автор')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='cached', author=cls.author
+        )
+        cls.list_url = reverse('notes:list')
+        cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.author)
+
+    def cache_outcome(self, url):
+        return self.client.get(url)['X-Notes-Cache']
+
+    # п.7 Повторный запрос страницы берётся из кеша.
+    def test_pages_are_cached(self):
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url=url):
+                self.assertEqual(self.cache_outcome(url), MISS)
+                self.assertEqual(self.cache_outcome(url), HIT)
+        self.assertEqual(cache_stats(), {HIT: 2, MISS: 2})
+
+    # п.8 Создание, изменение и удаление заметки сбрасывают кеш автора.
+    def test_changes_invalidate_pages(self):
+        self.cache_outcome(self.list_url)
+        self.client.post(reverse('notes:add'), {'title': 'Новая', 'text': 'Т'})
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Notes-Cache'], MISS)
+        self.assertContains(response, 'Новая')
+        self.cache_outcome(self.detail_url)
+        self.note.text = 'Изменённый текст'
+        self.note.save()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Notes-Cache'], MISS)
+        self.assertContains(response, 'Изменённый текст')
+        self.client.post(reverse('notes:delete', args=(self.note.slug,)))
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    # п.8.1 Новый пользователь с id и именем того, чьи строки исчезли
+    # без сигналов (откат транзакции), не получает его страниц из кеша.
+    def test_new_user_gets_no_stale_pages(self):
+        with transaction.atomic():
+            old = User.objects.create(pk=10_000, username='Тёзка')
+            Note.objects.create(
+                title='Чужая заметка', text='Текст', slug='stale', author=old
+            )
+            self.client.force_login(old)
+            self.assertEqual(self.cache_outcome(self.list_url), MISS)
+            transaction.set_rollback(True)
+        new = User.objects.create(pk=old.pk, username=old.username)
+        # Сессия старого клиента откатилась вместе с пользователем.
+        client = Client()
+        client.force_login(new)
+        response = client.get(self.list_url)
+        self.assertEqual(response['X-Notes-Cache'], MISS)
+        self.assertNotContains(response, 'Чужая заметка')
+
+
+class TestCachedAuth(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Кешированный')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_authenticated_page_without_auth_queries(self):
+        url = reverse('notes:home')
+        # Первый запрос кладёт пользователя в кеш.
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Кешированный')
+
+    def test_user_change_invalidates_cache(self):
+        url = reverse('notes:home')
+        self.client.get(url)
+        self.author.username = 'Переименованный'
+        self.author.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'Переименованный')
+
+
+class TestCompression(TestCase):
+    NOTES_COUNT = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Сжатый')
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст', slug=f'n{index}',
+                 author=cls.author)
+            for index in range(cls.NOTES_COUNT)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.author)
+        self.async_client.force_login(self.author)
+        # Соединение теста открыто раньше, чем SQLTraceMiddleware
+        # загрузится в потоке цикла событий AsyncClient.
+        install_trace(connection)
+
+    def test_long_list_compressed(self):
+        url = reverse('notes:list')
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_export_stream_compressed(self):
+        response = self.client.get(
+            reverse('notes:export'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(
+            b''.join(response.streaming_content)
+        ).decode().splitlines()
+        self.assertEqual(len(lines), self.NOTES_COUNT)
+
+    # Под ASGI middleware проекта не переводят цепочку в синхронный
+    # режим: страница сжимается, запросы к БД попадают в трассировку.
+    @override_settings(SQL_TRACE=True)
+    async def test_async_middleware_chain(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        for middleware in (SQLTraceMiddleware, CompressionMiddleware):
+            with self.subTest(middleware=middleware.__name__):
+                self.assertTrue(
+                    asyncio.iscoroutinefunction(middleware(get_response))
+                )
+        get_cache().clear()
+        response = await self.async_client.get(
+            reverse('notes:list'), **{'accept-encoding': 'gzip'}
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Заметка 1', gzip.decompress(response.content).decode())
+        self.assertRegex(response['X-SQL-Trace'], r'^queries=[1-9]')
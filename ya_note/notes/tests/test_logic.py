@@ -1,14 +1,27 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 from pytils.translit import slugify
 
 # Импортируем из файла с формами список стоп-слов и предупреждение формы.
 # Загляните в news/forms.py, разберитесь с их назначением.
+from notes.checks import check_shared_caches
 from notes.forms import WARNING
 from notes.models import Note
+from notes.search import like_search
+from notes.slugs import slugify as fast_slugify
 
 
 User = get_user_model()
@@ -178,3 +191,277 @@ class TestNoteEditDelete(TestCase):
         # Убедимся, что комментарий по-прежнему на месте.
         note_count = Note.objects.count()
         self.assertEqual(note_count, 1)
+
+
+# п.5 При одновременном создании заметок с одинаковым заголовком
+# каждая получает свой slug с суффиксом.
+class TestConcurrentSlugs(TransactionTestCase):
+    THREADS = 4
+    NOTES_PER_THREAD = 250
+    TITLE = 'Одинаковый заголовок'
+    # Обычно хватает пары десятков попыток; постоянная блокировка
+    # или ошибка схемы должны уронить тест, а не повесить его.
+    LOCK_ATTEMPTS = 1000
+
+    def create_note(self, author):
+        # Тестовая БД в памяти с общим кешем блокирует таблицу целиком
+        # на время чужой записи; такую попытку просто повторяем.
+        for attempt in range(self.LOCK_ATTEMPTS):
+            try:
+                return Note.objects.create(
+                    title=self.TITLE, text='Текст', author=author
+                )
+            except OperationalError:
+                if attempt == self.LOCK_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.001)
+
+    def create_notes(self, author):
+        try:
+            for _ in range(self.NOTES_PER_THREAD):
+                self.create_note(author)
+        finally:
+            connection.close()
+
+    def test_identical_titles_get_unique_slugs(self):
+        author = User.objects.create(username='Многостаночник')
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            futures = [
+                executor.submit(self.create_notes, author)
+                for _ in range(self.THREADS)
+            ]
+        for future in futures:
+            # Исключение из потока перевыбрасывается здесь.
+            future.result()
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        total = self.THREADS * self.NOTES_PER_THREAD
+        self.assertEqual(len(slugs), total)
+        self.assertEqual(len(set(slugs)), total)
+        base = slugify(self.TITLE)
+        expected = {base, *(f'{base}-{n}' for n in range(2, total + 1))}
+        self.assertEqual(set(slugs), expected)
+
+
+# п.6 Быстрый slugify даёт тот же результат, что pytils,
+# на случайном наборе строк.
+class TestSlugify(TestCase):
+    CASES = 5000
+    MAX_LENGTH = 40
+    SYMBOLS = (
+        *'абвгдеёжзийклмнопрстуфхцчшщъыьэюя',
+        *'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ',
+        *'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
+        *' \t\n-_&;.,!?\'"«»“”‘’–—‒−…№#@()[]/\\`~%^*+=<>|',
+        '&amp;', 'İ', 'ß', 'é', 'ǅ', 'ﬁ', '́', '😀',
+    )
+
+    def test_matches_pytils(self):
+        rng = random.Random(0)
+        for _ in range(self.CASES):
+            text = ''.join(
+                rng.choice(self.SYMBOLS)
+                for _ in range(rng.randint(0, self.MAX_LENGTH))
+            )
+            with self.subTest(text=text):
+                self.assertEqual(fast_slugify(text), slugify(text))
+
+
+# п.7 Выгрузка и загрузка заметок в формате JSON Lines.
+class TestNoteTransfer(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Переезжающий')
+        cls.reader = User.objects.create(username='Посторонний')
+        cls.note = Note.objects.create(
+            title='Старая заметка', text='Текст', slug='old',
+            author=cls.author,
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=cls.reader
+        )
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+
+    def test_export_streams_own_notes(self):
+        response = self.client_author.get(reverse('notes:export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'title': 'Старая заметка', 'text': 'Текст', 'slug': 'old'}],
+        )
+
+    def test_import_allocates_slugs_and_reports_errors(self):
+        rows = [
+            {'title': 'Старая заметка', 'text': 'Копия', 'slug': 'old'},
+            {'title': 'Без адреса', 'text': 'Один'},
+            {'title': 'Без адреса', 'text': 'Два'},
+            {'title': 'Без текста'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows) + '\n{oops\n'
+        upload = SimpleUploadedFile('notes.jsonl', content.encode())
+        response = self.client_author.post(
+            reverse('notes:import'), {'file': upload}
+        )
+        report = response.json()
+        self.assertEqual(report['imported'], 3)
+        self.assertEqual(report['skipped'], 2)
+        self.assertEqual(len(report['errors']), 2)
+        base = slugify('Без адреса')
+        self.assertEqual(
+            set(Note.objects.filter(author=self.author).values_list(
+                'slug', flat=True
+            )),
+            {'old', 'old-2', base, f'{base}-2'},
+        )
+
+
+class TestCompressedText(TestCase):
+    # Текст длиннее порога сжатия, хорошо сжимается.
+    LONG_TEXT = 'Очень длинная заметка про ёжика. ' * 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Многословный')
+        cls.note = Note.objects.create(
+            title='Большая', text=cls.LONG_TEXT + 'финал', author=cls.author,
+        )
+        cls.short = Note.objects.create(
+            title='Маленькая', text=cls.LONG_TEXT[:100], author=cls.author,
+        )
+
+    def stored(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text), length(text) FROM notes_note '
+                'WHERE id = %s', [note.pk]
+            )
+            return cursor.fetchone()
+
+    def test_long_text_stored_compressed(self):
+        kind, size = self.stored(self.note)
+        self.assertEqual(kind, 'blob')
+        self.assertLess(size, len(self.LONG_TEXT) // 10)
+        self.assertEqual(self.stored(self.short)[0], 'text')
+
+    def test_text_decompressed_on_every_read(self):
+        text = self.LONG_TEXT + 'финал'
+        self.assertEqual(Note.objects.get(pk=self.note.pk).text, text)
+        self.assertEqual(
+            Note.objects.filter(pk=self.note.pk).values('text')[0],
+            {'text': text},
+        )
+        self.assertEqual(
+            list(Note.objects.filter(pk=self.note.pk).values_list(
+                'text', flat=True
+            )),
+            [text],
+        )
+
+    def test_lookups_compare_decompressed_text(self):
+        for lookup, value in (
+            ('text__contains', 'ёжика. финал'),
+            ('text__endswith', 'финал'),
+            ('text', self.LONG_TEXT + 'финал'),
+        ):
+            with self.subTest(lookup=lookup):
+                self.assertEqual(
+                    list(Note.objects.filter(**{lookup: value})), [self.note]
+                )
+
+    def test_like_search_finds_compressed_text(self):
+        # Поиск, которым search_notes пользуется на базах без FTS5.
+        self.assertEqual(like_search(self.author, 'финал'), [self.note])
+
+    def test_untouched_text_saved_as_is(self):
+        note = Note.objects.get(pk=self.note.pk)
+        note.title = 'Переименованная'
+        note.save()
+        self.assertEqual(
+            Note.objects.get(pk=self.note.pk).text, self.LONG_TEXT + 'финал'
+        )
+
+    def test_compressed_text_searchable_and_exported(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse('notes:search'), {'q': 'финал'})
+        found = [note.pk for note in response.context['object_list']]
+        self.assertEqual(found, [self.note.pk])
+        lines = b''.join(
+            client.get(reverse('notes:export')).streaming_content
+        ).decode().splitlines()
+        texts = {json.loads(line)['title']: json.loads(line)['text']
+                 for line in lines}
+        self.assertEqual(texts['Большая'], self.LONG_TEXT + 'финал')
+
+
+# п.8 Команда seed при одном и том же --seed создаёт те же строки,
+# slug строится из кириллического заголовка и id заметки.
+class TestSeed(TestCase):
+    ARGS = (
+        'seed', '--users', '20', '--notes-per-author', '3', '--alpha', '1.5',
+        '--until', '2024-01-01', '--seed', '7',
+    )
+
+    def seeded_rows(self):
+        users = User.objects.filter(username__startswith='seed7_')
+        return (
+            list(users.values_list('id', 'username', 'date_joined')),
+            list(Note.objects.values_list(
+                'id', 'title', 'text', 'slug', 'author_id'
+            )),
+        )
+
+    def test_seed_is_reproducible(self):
+        call_command(*self.ARGS, stdout=StringIO())
+        users, notes = self.seeded_rows()
+        self.assertEqual(len(users), 20)
+        self.assertTrue(notes)
+        Note.objects.all().delete()
+        User.objects.filter(username__startswith='seed7_').delete()
+        call_command(*self.ARGS, stdout=StringIO())
+        self.assertEqual(self.seeded_rows(), (users, notes))
+
+    def test_seed_slugs_follow_titles(self):
+        call_command(*self.ARGS, stdout=StringIO())
+        for title, slug, pk in Note.objects.values_list(
+            'title', 'slug', 'pk'
+        ):
+            with self.subTest(title=title):
+                self.assertTrue(slug.startswith(fast_slugify(title)[:20]))
+                self.assertTrue(slug.endswith(f'-{pk}'))
+
+
+# п.9 check --deploy не пропускает кеш в памяти процесса там, где
+# сброс должен быть виден всем процессам.
+class TestSharedCacheCheck(TestCase):
+    MEMCACHED = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': '127.0.0.1:11211',
+        },
+    }
+
+    def rejected(self):
+        errors = check_shared_caches(None)
+        for error in errors:
+            self.assertEqual(error.id, 'notes.E001')
+        return {error.msg.split(' = ')[0] for error in errors}
+
+    def test_local_memory_cache_rejected(self):
+        self.assertEqual(self.rejected(), {
+            'NOTES_CACHE_ALIAS', 'AUTH_USER_CACHE_ALIAS',
+            'SESSION_CACHE_ALIAS',
+        })
+
+    # Сессии только в базе кеш не используют.
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_database_sessions_need_no_shared_cache(self):
+        self.assertEqual(
+            self.rejected(), {'NOTES_CACHE_ALIAS', 'AUTH_USER_CACHE_ALIAS'}
+        )
+
+    def test_shared_cache_accepted(self):
+        with override_settings(CACHES=self.MEMCACHED):
+            self.assertEqual(self.rejected(), set())
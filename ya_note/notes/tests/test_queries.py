@@ -0,0 +1,142 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from notes.models import Note
+from notes.tests.datasets import DatasetTestCase
+from yacommon.snapshots import dataset
+
+User = get_user_model()
+
+ANONYMOUS, AUTHOR, READER = 'anonymous', 'author', 'reader'
+# Адреса админки — код Django, их бюджеты не проверяем.
+SKIP_NAMESPACES = {'admin'}
+
+# Наибольшее число SQL-запросов: адрес -> метод -> роль -> запросов.
+# Бюджет не зависит от объёма данных и проверяется на двух наборах.
+QUERY_BUDGETS = {
+    'notes:home': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+    'notes:add': {
+        'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1},
+        'post': {ANONYMOUS: 0, AUTHOR: 3, READER: 3},
+    },
+    'notes:edit': {
+        'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2},
+        'post': {ANONYMOUS: 0, AUTHOR: 4, READER: 2},
+    },
+    'notes:detail': {'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2}},
+    'notes:delete': {
+        'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2},
+        'post': {ANONYMOUS: 0, AUTHOR: 3, READER: 2},
+    },
+    'notes:list': {'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2}},
+    'notes:search': {'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2}},
+    'notes:export': {'get': {ANONYMOUS: 0, AUTHOR: 2, READER: 2}},
+    'notes:import': {
+        'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1},
+        'post': {ANONYMOUS: 0, AUTHOR: 5, READER: 5},
+    },
+    'notes:success': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+    'users:login': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+    'users:logout': {'get': {ANONYMOUS: 0, AUTHOR: 3, READER: 3}},
+    'users:signup': {'get': {ANONYMOUS: 0, AUTHOR: 1, READER: 1}},
+}
+# Адреса, которым нужен slug заметки автора.
+SLUG_ROUTES = {'notes:edit', 'notes:detail', 'notes:delete'}
+# Сколько заметок у каждого пользователя в большом наборе.
+LARGE_NOTES = settings.NOTES_COUNT_ON_LIST_PAGE * 3
+
+
+@dataset('queries_large', parent='note')
+def build_queries_large():
+    for user in User.objects.all():
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=f'Текст заметки {index}',
+                 slug=f'note-{user.pk}-{index}', author=user)
+            for index in range(LARGE_NOTES)
+        )
+    return {}
+
+
+def named_routes():
+    """Имена всех адресов из ROOT_URLCONF вида namespace:name."""
+    names = set()
+    for namespace, (_, resolver) in get_resolver().namespace_dict.items():
+        if namespace in SKIP_NAMESPACES:
+            continue
+        names.update(
+            f'{namespace}:{name}' for name in resolver.reverse_dict
+            if isinstance(name, str)
+        )
+    return names
+
+
+def request_data(name, method):
+    if method == 'get':
+        return {'q': 'текст'} if name == 'notes:search' else {}
+    if name == 'notes:import':
+        line = json.dumps({'title': 'Импорт', 'text': 'Текст'}) + '\n'
+        return {'file': SimpleUploadedFile(
+            'notes.jsonl', line.encode(), 'application/x-ndjson'
+        )}
+    return {
+        'notes:add': {'title': 'Новая', 'text': 'Текст', 'slug': 'new'},
+        'notes:edit': {'title': 'Правка', 'text': 'Текст', 'slug': 'Svoi'},
+    }.get(name, {})
+
+
+# Бюджеты запросов каждого адреса для анонима, автора и читателя.
+class TestQueryBudgets(DatasetTestCase):
+    datasets = ('note',)
+
+    # п.1 Бюджет запросов объявлен для каждого адреса проекта.
+    def test_every_route_has_query_budget(self):
+        self.assertEqual(named_routes(), set(QUERY_BUDGETS))
+
+    # п.2 Ни один адрес не превышает бюджет запросов ни для одной роли.
+    def test_query_budgets(self):
+        users = {AUTHOR: self.author, READER: self.reader}
+        for name, methods in QUERY_BUDGETS.items():
+            args = (self.note.slug,) if name in SLUG_ROUTES else ()
+            url = reverse(name, args=args)
+            for method, roles in methods.items():
+                for role, budget in roles.items():
+                    with self.subTest(name=name, method=method, role=role):
+                        self.check_budget(
+                            url, method, users.get(role), budget,
+                            request_data(name, method),
+                        )
+
+    def check_budget(self, url, method, user, budget, data):
+        # Кеш страниц и пользователей не откатывается вместе
+        # с транзакцией: каждый запрос начинается с пустого кеша,
+        # в котором есть только сессия.
+        for cache in caches.all():
+            cache.clear()
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(url, data)
+                # Потоковый ответ выполняет запросы при чтении.
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            transaction.set_rollback(True)
+        self.assertLessEqual(len(queries), budget, (
+            f'{method.upper()} {url}: {len(queries)} запросов '
+            f'при бюджете {budget}:\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        ))
+
+
+# Те же бюджеты, когда у каждого пользователя несколько страниц заметок.
+class TestQueryBudgetsLargeDataset(TestQueryBudgets):
+    datasets = ('note', 'queries_large')
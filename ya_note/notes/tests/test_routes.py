@@ -1,29 +1,30 @@
+import asyncio
+import threading
 from http import HTTPStatus
+from unittest.mock import patch
 
 # Импортируем функцию для определения модели пользователя.
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.template import engines
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 # Импортируем класс заметки.
+from notes import async_views, views
+from notes.cache import get_cache
 from notes.models import Note
+from notes.tests.datasets import DatasetTestCase
+from yacommon.middleware import SQLTraceMiddleware
+from yacommon.warmup import project_templates, warm_up
 
 # Получаем модель пользователя.
 User = get_user_model()
 
 
-class TestRoutes(TestCase):
-
-    @classmethod
-    def setUpTestData(cls):
-        # Создаём двух пользователей с разными именами:
-        cls.author = User.objects.create(username='Создатель')
-        cls.reader = User.objects.create(username='Читатель')
-        # # От имени одного пользователя создаём замекту:
-        cls.note = Note.objects.create(
-            title='Название заголовка',
-            text='Пишу текст',
-            slug='Svoi',
-            author=cls.author)
+class TestRoutes(DatasetTestCase):
+    # Два пользователя, у одного из них заметка.
+    datasets = ('note',)
 
     # п.1, 5 Главная страница, логина,логаута, регистрация доступна
     # анонимному пользователю
@@ -118,3 +119,90 @@ class TestRoutes(TestCase):
                 url = reverse(name)
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    # п.6 Трассировка SQL сообщает в заголовке число запросов страницы.
+    @override_settings(SQL_TRACE=True)
+    def test_sql_trace_header(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('notes:list'))
+        self.assertRegex(response['X-SQL-Trace'], r'^queries=\d+; ')
+
+
+# п.7 Асинхронные версии представлений работают с БД
+# в ограниченном пуле потоков.
+class TestAsyncViews(TransactionTestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='Асинхронный')
+        self.note = Note.objects.create(
+            title='Заметка из пула', text='Текст', slug='pool',
+            author=self.author,
+        )
+
+    def get(self, view_class, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = self.author
+        request.session = {}
+        view = async_views.as_async_view(view_class)
+        return asyncio.run(view(request, **kwargs))
+
+    def test_async_views_render_in_db_pool(self):
+        threads = set()
+        original = async_views._call_in_request_scope
+
+        def spy(func, *args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return original(func, *args, **kwargs)
+
+        with patch.object(async_views, '_call_in_request_scope', spy):
+            for view_class, kwargs in (
+                (views.NotesList, {}),
+                (views.NoteDetail, {'slug': self.note.slug}),
+                (views.NoteUpdate, {'slug': self.note.slug}),
+                (views.NoteDelete, {'slug': self.note.slug}),
+                (views.NoteCreate, {}),
+            ):
+                with self.subTest(view=view_class.__name__):
+                    response = self.get(view_class, **kwargs)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(all(name.startswith('notes-db') for name in threads))
+
+    # п.7.1 Запросы к БД из потоков пула попадают в трассировку SQL:
+    # асинхронная страница показывает столько же запросов, сколько
+    # синхронная.
+    @override_settings(SQL_TRACE=True)
+    def test_async_views_traced(self):
+        async def async_response(request):
+            view = async_views.as_async_view(views.NotesList)
+            return await view(request)
+
+        def sync_response(request):
+            return views.NotesList.as_view()(request).render()
+
+        traces = []
+        for get_response in (async_response, sync_response):
+            get_cache().clear()
+            request = RequestFactory().get('/')
+            request.user = self.author
+            middleware = SQLTraceMiddleware(get_response)
+            response = middleware(request)
+            if asyncio.iscoroutine(response):
+                response = asyncio.run(response)
+            traces.append(response['X-SQL-Trace'].split(';')[0])
+        self.assertNotEqual(traces[0], 'queries=0')
+        self.assertEqual(traces[0], traces[1])
+
+
+# п.8 Прогрев при запуске компилирует все шаблоны проекта.
+class TestWarmUp(TestCase):
+
+    @override_settings(WARM_UP=True)
+    def test_warm_up_compiles_templates(self):
+        names = project_templates(engines['django'])
+        self.assertTrue(
+            {'notes/list.html', 'notes/detail.html', 'base.html'}
+            <= set(names)
+        )
+        with self.assertLogs('yacommon.warmup', 'INFO') as logs:
+            warm_up()
+        self.assertIn(f'{len(names)} templates', logs.output[0])
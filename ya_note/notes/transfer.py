@@ -0,0 +1,130 @@
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+from .cache import bump_generation
+from .forms import ImportedNoteForm
+from .models import Note
+from .slugs import allocate_slugs, slugify
+
+FIELDS = ImportedNoteForm.Meta.fields
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+# Сколько ошибок разбора попадает в отчёт.
+MAX_REPORTED_ERRORS = 100
+
+
+def export_notes(author, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Заметки автора в формате JSON Lines, по строке на заметку.
+
+    Строки читаются из базы порциями через iterator(), поэтому память
+    не зависит от числа заметок.
+    """
+    notes = Note.objects.filter(author=author).order_by('id').values_list(
+        *FIELDS
+    ).iterator(chunk_size=chunk_size)
+    for values in notes:
+        note = dict(zip(FIELDS, values))
+        yield json.dumps(note, ensure_ascii=False)
+        yield '\n'
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def notes_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def add_error(self, line_number, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Строка {line_number}: {message}')
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 3),
+            'notes_per_second': round(self.notes_per_second, 1),
+        }
+
+
+def parse_note(author, line_number, line, report):
+    """Заметка из строки JSON или None, если строка с ошибкой."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        report.add_error(line_number, 'некорректный JSON.')
+        return None
+    if not isinstance(data, dict):
+        report.add_error(line_number, 'ожидается объект JSON.')
+        return None
+    form = ImportedNoteForm(data)
+    if not form.is_valid():
+        report.add_error(line_number, '; '.join(
+            f'{name}: {" ".join(errors)}'
+            for name, errors in form.errors.items()
+        ))
+        return None
+    note = form.save(commit=False)
+    note.author = author
+    return note
+
+
+def import_batch(notes):
+    """Сохраняет порцию заметок: slug подбираются для всей порции сразу."""
+    max_length = Note._meta.get_field('slug').max_length
+    slugs = allocate_slugs(
+        Note.objects.all(),
+        [note.slug or slugify(note.title) for note in notes],
+        max_length,
+    )
+    for note, slug in zip(notes, slugs):
+        note.slug = slug
+    Note.objects.bulk_create(notes)
+
+
+def import_notes(author, lines, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Импорт заметок автора из строк JSON Lines.
+
+    Строки проверяются и сохраняются порциями по batch_size через
+    bulk_create, весь импорт — одна транзакция. progress, если передан,
+    вызывается с отчётом после каждой порции. Строки с ошибками
+    пропускаются и попадают в отчёт.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    numbered = (
+        (number, line) for number, line in enumerate(lines, start=1)
+        if line.strip()
+    )
+    with transaction.atomic():
+        for batch in iter(lambda: list(islice(numbered, batch_size)), []):
+            notes = [
+                note for note in (
+                    parse_note(author, number, line, report)
+                    for number, line in batch
+                )
+                if note is not None
+            ]
+            if notes:
+                import_batch(notes)
+            report.imported += len(notes)
+            report.seconds = time.perf_counter() - start
+            if progress is not None:
+                progress(report)
+        # bulk_create не отправляет сигналы, поэтому кеш сбрасываем сами.
+        transaction.on_commit(lambda: bump_generation(author.pk))
+    report.seconds = time.perf_counter() - start
+    return report
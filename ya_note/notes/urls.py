@@ -1,15 +1,27 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import async_views, views
 
 app_name = 'notes'
 
+
+def note_view(view_class):
+    """Под ASGI можно включить асинхронные версии представлений."""
+    if settings.NOTES_ASYNC_VIEWS:
+        return async_views.as_async_view(view_class)
+    return view_class.as_view()
+
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
-    path('add/', views.NoteCreate.as_view(), name='add'),
-    path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
-    path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('add/', note_view(views.NoteCreate), name='add'),
+    path('edit/<slug:slug>/', note_view(views.NoteUpdate), name='edit'),
+    path('note/<slug:slug>/', note_view(views.NoteDetail), name='detail'),
+    path('delete/<slug:slug>/', note_view(views.NoteDelete), name='delete'),
+    path('notes/', note_view(views.NotesList), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path('import/', views.NoteImport.as_view(), name='import'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
@@ -1,9 +1,18 @@
+import codecs
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
+from yacommon.pagination import paginate_keyset
 
-from .forms import NoteForm
+from .cache import CachedPageMixin
+from .forms import ImportFileForm, NoteForm
 from .models import Note
+from .search import search_notes
+from .transfer import export_notes, import_notes
 
 
 class Home(generic.TemplateView):
@@ -32,9 +41,8 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        # Заметку сохраняет CreateView, повторный save() дал бы UPDATE.
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -49,11 +57,83 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
+class NotesList(NoteBase, CachedPageMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    ordering = ('id',)
 
-
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_queryset(self):
+        """
+        Одна страница заметок в порядке создания.
+
+        Переход между страницами — по курсору из параметра cursor
+        по индексу (author_id, id). Текст заметок шаблону списка
+        не нужен и не загружается.
+        """
+        self.page = paginate_keyset(
+            super().get_queryset().only('id', 'slug', 'title'),
+            self.ordering,
+            settings.NOTES_COUNT_ON_LIST_PAGE,
+            self.request.GET.get('cursor'),
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        context['prev_cursor'] = self.page.prev_cursor
+        return context
+
+
+class NoteDetail(NoteBase, CachedPageMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user, self.request.GET.get('q', '')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя в формате JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            export_notes(request.user),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.jsonl"'
+        return response
+
+
+class NoteImport(NoteBase, generic.FormView):
+    """Загрузка заметок из файла JSON Lines; отвечает отчётом в JSON."""
+    template_name = 'notes/import.html'
+    form_class = ImportFileForm
+
+    def form_valid(self, form):
+        lines = codecs.iterdecode(form.cleaned_data['file'], 'utf-8')
+        try:
+            report = import_notes(self.request.user, lines)
+        except UnicodeDecodeError:
+            return JsonResponse(
+                {'error': 'Файл должен быть в кодировке UTF-8.'}, status=400
+            )
+        except IntegrityError:
+            return JsonResponse(
+                {'error': 'Заметки изменились во время импорта, '
+                          'повторите попытку.'},
+                status=409,
+            )
+        return JsonResponse(report.as_dict())
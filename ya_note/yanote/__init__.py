@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Общий код YaNews и YaNote — пакет yacommon в корне репозитория.
+ROOT_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
@@ -11,6 +11,12 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from yacommon.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+os.environ.setdefault('YANOTE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Шаблоны и URLconf готовятся до первого запроса.
+warm_up()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.SQLTraceMiddleware',
+    'yacommon.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +62,9 @@ DATABASES = {
     }
 }
 
+# Профиль PRAGMA для соединений с SQLite, см. yacommon.sqlite.
+SQLITE_PRAGMA_PROFILE = 'production'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -69,6 +75,48 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Пользователь сессии берётся из кеша, см. yacommon.auth.
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Кеш в памяти процесса подходит для разработки и тестов. В бою кеши
+# должны быть общими для всех процессов, см. settings_production.py
+# и notes.checks.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Сессии читаются из кеша, изменения пишутся и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Трассировка SQL-запросов: yacommon.middleware.SQLTraceMiddleware.
+SQL_TRACE = False
+SQL_TRACE_N_PLUS_ONE_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'sqltrace': {
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'sqltrace.log',
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['sqltrace'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -87,3 +135,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
+# Кеш отрисованных страниц заметок, см. notes.cache.
+NOTES_CACHE_ALIAS = 'default'
+NOTES_CACHE_TIMEOUT = 300
+
+# Асинхронные представления заметок, включаются в yanote/asgi.py.
+NOTES_ASYNC_VIEWS = os.environ.get('YANOTE_ASYNC_VIEWS') == '1'
+# Размер пула потоков, в котором асинхронные представления работают с БД.
+NOTES_DB_THREADS = 4
+
+# Прогрев процесса при запуске, включён в settings_production.
+WARM_UP = False
+
+# Сжатие ответов, см. yacommon.middleware.CompressionMiddleware.
+COMPRESSION_MIN_LENGTH = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# Уже сжатые форматы сжимать бесполезно.
+COMPRESSION_SKIP_TYPES = (
+    'image/',
+    'video/',
+    'audio/',
+    'font/woff',
+    'application/zip',
+    'application/gzip',
+    'application/x-brotli',
+)
@@ -0,0 +1,23 @@
+"""
+Настройки для боевого запуска.
+
+DJANGO_SETTINGS_MODULE=yanote.settings_production, остальное задаётся
+переменными окружения YANOTE_SECRET_KEY, YANOTE_ALLOWED_HOSTS,
+YANOTE_DATABASE и YANOTE_CACHE_LOCATION.
+
+Если процессов несколько, кеш должен быть общим: адрес memcached
+(host:port, несколько через запятую) задаётся в YANOTE_CACHE_LOCATION,
+нужен пакет pymemcache. manage.py check --deploy проверяет это.
+"""
+from yacommon import production
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, TEMPLATES
+
+DEBUG = False
+SECRET_KEY = production.secret_key('YANOTE')
+ALLOWED_HOSTS = production.allowed_hosts('YANOTE')
+DATABASES = production.databases('YANOTE', DATABASES)
+CACHES = production.caches('YANOTE', CACHES)
+TEMPLATES = production.cached_templates(TEMPLATES)
+WARM_UP = production.warm_up('YANOTE')
@@ -0,0 +1,6 @@
+"""
+Общий код проектов YaNews и YaNote.
+
+Пакет лежит в корне репозитория, в sys.path его добавляют
+yanews/__init__.py и yanote/__init__.py.
+"""
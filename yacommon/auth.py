@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_KEY = 'auth:user:{user_id}'
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def invalidate_user(user_id):
+    """Убирает пользователя из кеша после изменения или удаления."""
+    get_cache().delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя сессии из кеша.
+
+    AuthenticationMiddleware вызывает get_user на каждом запросе;
+    с кешем запрос к auth_user уходит только после изменения
+    пользователя или истечения AUTH_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
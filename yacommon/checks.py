@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+from django.utils.module_loading import import_string
+
+# С этими движками сессия, удалённая при выходе в одном процессе,
+# осталась бы действующей в кеше другого.
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def shared_cache_settings(names):
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        return (*names, 'SESSION_CACHE_ALIAS')
+    return names
+
+
+def local_cache_errors(names, location_env, error_id):
+    """Ошибки для настроек из names, указывающих на LocMemCache."""
+    errors = []
+    for name in shared_cache_settings(names):
+        alias = getattr(settings, name)
+        backend = import_string(settings.CACHES[alias]['BACKEND'])
+        if issubclass(backend, LocMemCache):
+            errors.append(Error(
+                f'{name} = {alias!r}: кеш LocMemCache свой у каждого '
+                f'процесса, сброс в одном процессе не виден остальным.',
+                hint='Задайте общий кеш, например memcached через '
+                     f'{location_env}.',
+                id=error_id,
+            ))
+    return errors
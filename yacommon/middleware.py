@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import re
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+
+from .tracing import install_trace, record_queries
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACES = re.compile(r'\s+')
+
+
+def async_mode(middleware):
+    """
+    Включает асинхронный режим middleware, если get_response — корутина.
+
+    Как и у MiddlewareMixin, экземпляр тогда сам считается корутинной
+    функцией, и Django не переводит цепочку в синхронный поток.
+    """
+    if asyncio.iscoroutinefunction(middleware.get_response):
+        middleware._is_coroutine = asyncio.coroutines._is_coroutine
+        return True
+    return False
+
+
+def normalize_sql(sql):
+    """Форма запроса без значений: одинаковые запросы дают одну строку."""
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = LITERALS.sub('?', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class SQLTraceMiddleware:
+    """
+    Трассировка SQL-запросов каждого запроса к сайту.
+
+    Включается настройкой SQL_TRACE. Запросы группируются по форме,
+    формы, повторившиеся SQL_TRACE_N_PLUS_ONE_THRESHOLD раз и более,
+    считаются вероятным N+1. Сводка уходит в заголовок X-SQL-Trace,
+    подробный отчёт со стеками — в лог yacommon.middleware.
+    Запросы, выполненные при отдаче StreamingHttpResponse,
+    в отчёт не попадают.
+    """
+    header = 'X-SQL-Trace'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_TRACE', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SQL_TRACE_N_PLUS_ONE_THRESHOLD
+        self.is_async = async_mode(self)
+        # Уже открытые соединения этого потока и те, что откроются
+        # позже в любом потоке.
+        for connection in connections.all():
+            install_trace(connection)
+        connection_created.connect(install_trace, dispatch_uid=__name__)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with record_queries(connections) as recorders:
+            response = self.get_response(request)
+        self.report(request, response, recorders)
+        return response
+
+    async def __acall__(self, request):
+        with record_queries(connections) as recorders:
+            response = await self.get_response(request)
+        self.report(request, response, recorders)
+        return response
+
+    def report(self, request, response, recorders):
+        queries = [
+            query
+            for recorder in recorders.values()
+            for query in recorder.queries
+        ]
+        shapes = defaultdict(list)
+        for query in queries:
+            shapes[normalize_sql(query.sql)].append(query)
+        repeated = {
+            shape: same for shape, same in shapes.items()
+            if len(same) >= self.threshold
+        }
+        total = sum(query.duration for query in queries) * 1000
+        response[self.header] = (
+            f'queries={len(queries)}; time={total:.3f}ms; '
+            f'n+1={len(repeated)}'
+        )
+        lines = [
+            f'{request.method} {request.get_full_path()}: '
+            f'{len(queries)} queries, {total:.3f} ms'
+        ]
+        for shape, same in sorted(
+                shapes.items(), key=lambda item: -len(item[1])
+        ):
+            duration = sum(query.duration for query in same) * 1000
+            mark = ' [N+1]' if shape in repeated else ''
+            lines.append(f'  {len(same)}x {duration:.3f} ms{mark}: {shape}')
+            if mark:
+                stacks = {tuple(query.stack) for query in same}
+                for stack in sorted(stacks):
+                    lines.append('    ---')
+                    lines.extend(f'    {frame}' for frame in stack)
+        log = logger.warning if repeated else logger.info
+        log('\n'.join(lines))
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits=31: формат gzip, а не «голый» zlib.
+        self._compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31
+        )
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+# В порядке предпочтения сервера; brotli — необязательная зависимость.
+ENCODERS = [GzipEncoder] if brotli is None else [BrotliEncoder, GzipEncoder]
+
+
+def parse_accept_encoding(header):
+    """Кодировки из Accept-Encoding с их весами q."""
+    weights = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    return weights
+
+
+def choose_encoder(header):
+    """Лучший из поддерживаемых кодировщиков, который принимает клиент."""
+    weights = parse_accept_encoding(header)
+    default = weights.get('*', 0.0)
+    candidates = [
+        (weights.get(encoder.name, default), -index, encoder)
+        for index, encoder in enumerate(ENCODERS)
+    ]
+    weight, _, encoder = max(candidates, key=lambda item: item[:2])
+    return encoder if weight > 0 else None
+
+
+def compress_stream(chunks, encoder):
+    """
+    Сжимает поток по частям.
+
+    После каждой части данные сбрасываются, чтобы клиент получал их
+    сразу, а не после того, как накопится блок сжатия.
+    """
+    for chunk in chunks:
+        if chunk:
+            yield encoder.compress(chunk) + encoder.flush()
+    yield encoder.finish()
+
+
+async def acompress_stream(chunks, encoder):
+    """Асинхронный вариант compress_stream для асинхронных потоков."""
+    async for chunk in chunks:
+        if chunk:
+            yield encoder.compress(chunk) + encoder.flush()
+    yield encoder.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов в br или gzip по заголовку Accept-Encoding.
+
+    Не сжимает ответы короче COMPRESSION_MIN_LENGTH байт, уже сжатые
+    ответы и типы из COMPRESSION_SKIP_TYPES. StreamingHttpResponse
+    сжимается по мере отдачи, без чтения всего тела в память.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_length = settings.COMPRESSION_MIN_LENGTH
+        self.skip_types = tuple(settings.COMPRESSION_SKIP_TYPES)
+        self.is_async = async_mode(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or response.get('Content-Type', '').startswith(
+                    self.skip_types)):
+            return response
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder = choose_encoder(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder is None:
+            return response
+        if response.streaming:
+            # Асинхронное тело (is_async, Django 4.2+) сжимаем, не переводя
+            # его в синхронный итератор.
+            stream = (
+                acompress_stream if getattr(response, 'is_async', False)
+                else compress_stream
+            )
+            response.streaming_content = stream(
+                response.streaming_content, encoder()
+            )
+            del response['Content-Length']
+        else:
+            compressor = encoder()
+            content = compressor.compress(response.content)
+            content += compressor.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        # Тело уже не совпадает побайтно с исходным.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder.name
+        return response
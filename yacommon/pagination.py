@@ -0,0 +1,128 @@
+import base64
+import datetime
+import json
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Сохраняет дату и время с микросекундами, иначе ключ неоднозначен."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+@dataclass
+class KeysetPage:
+    """Страница выборки и курсоры на соседние страницы."""
+    object_list: list
+    next_cursor: str = None
+    prev_cursor: str = None
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключа в непрозрачную строку."""
+    raw = json.dumps([direction, *values], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Распаковывает курсор; на испорченный курсор отвечаем 404."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        direction, *values = json.loads(
+            base64.urlsafe_b64decode(cursor + padding)
+        )
+    except (ValueError, TypeError):
+        raise Http404('Некорректный курсор.')
+    if direction not in (FORWARD, BACKWARD) or len(values) != size:
+        raise Http404('Некорректный курсор.')
+    return direction, values
+
+
+def _keyset_filter(ordering, values, backward):
+    """
+    Условие «строго после ключа» для составной сортировки.
+
+    Для ключа (a, b) получается a <= x AND (a < x OR (a = x AND b < y)).
+    Первая граница избыточна, но только по ней база переходит по индексу
+    сразу к нужной позиции: одно условие с OR SQLite проверяет, просматривая
+    индекс с начала.
+    """
+    conditions = []
+    for index, field in enumerate(ordering):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending != backward else 'gt'
+        equal = {
+            other.lstrip('-'): value
+            for other, value in zip(ordering[:index], values)
+        }
+        conditions.append(
+            Q(**equal, **{f'{name}__{lookup}': values[index]})
+        )
+    after = reduce(or_, conditions)
+    if len(ordering) == 1:
+        return after
+    first = ordering[0]
+    lookup = 'lte' if first.startswith('-') != backward else 'gte'
+    return Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & after
+
+
+def _reverse_ordering(ordering):
+    return [
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    ]
+
+
+def _key(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+def paginate_keyset(queryset, ordering, per_page, cursor=None):
+    """
+    Постраничная выборка по курсору вместо OFFSET.
+
+    Стоимость любой страницы одинакова: база ищет позицию по индексу
+    на поля ordering, а не пропускает предыдущие строки.
+    """
+    direction, values = FORWARD, None
+    if cursor:
+        direction, values = decode_cursor(cursor, len(ordering))
+    backward = direction == BACKWARD
+    if values is not None:
+        queryset = queryset.filter(
+            _keyset_filter(ordering, values, backward)
+        )
+    queryset = queryset.order_by(
+        *(_reverse_ordering(ordering) if backward else ordering)
+    )
+    # Берём на одну запись больше, чтобы узнать, есть ли следующая страница.
+    object_list = list(queryset[:per_page + 1])
+    has_more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+    if backward:
+        object_list.reverse()
+    has_next = has_more if not backward else True
+    has_prev = has_more if backward else values is not None
+    page = KeysetPage(object_list)
+    if object_list and has_next:
+        page.next_cursor = encode_cursor(
+            FORWARD, _key(object_list[-1], ordering)
+        )
+    if object_list and has_prev:
+        page.prev_cursor = encode_cursor(
+            BACKWARD, _key(object_list[0], ordering)
+        )
+    return page
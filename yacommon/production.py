@@ -0,0 +1,71 @@
+"""
+Общая часть боевых настроек, см. settings_production.py проектов.
+
+Значения берутся из переменных окружения с префиксом проекта:
+{prefix}_SECRET_KEY, {prefix}_ALLOWED_HOSTS, {prefix}_DATABASE,
+{prefix}_CACHE_LOCATION и {prefix}_WARM_UP.
+"""
+import os
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def secret_key(prefix):
+    # Ключ из settings.py лежит в репозитории, в бою он недопустим.
+    name = f'{prefix}_SECRET_KEY'
+    key = os.environ.get(name)
+    if not key:
+        raise ImproperlyConfigured(
+            f'Задайте секретный ключ в переменной окружения {name}.'
+        )
+    return key
+
+
+def allowed_hosts(prefix):
+    return os.environ.get(
+        f'{prefix}_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+    ).split(',')
+
+
+def databases(prefix, databases):
+    databases = deepcopy(databases)
+    databases['default']['NAME'] = os.environ.get(
+        f'{prefix}_DATABASE', databases['default']['NAME']
+    )
+    for database in databases.values():
+        # Соединение потока переживает запрос, а не открывается
+        # заново на каждом.
+        database['CONN_MAX_AGE'] = 60
+    return databases
+
+
+def caches(prefix, caches):
+    """Memcached из {prefix}_CACHE_LOCATION (host:port через запятую)."""
+    location = os.environ.get(f'{prefix}_CACHE_LOCATION')
+    if not location:
+        return caches
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': location.split(','),
+        },
+    }
+
+
+def cached_templates(templates):
+    # Шаблоны читаются и разбираются один раз на процесс.
+    templates = deepcopy(templates)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    return templates
+
+
+def warm_up(prefix):
+    # Прогрев в wsgi.py и asgi.py, см. yacommon.warmup.
+    return os.environ.get(f'{prefix}_WARM_UP', '1') == '1'
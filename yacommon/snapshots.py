@@ -0,0 +1,253 @@
+"""
+Готовая схема тестовой базы и снимки наборов данных.
+
+Схема после миграций сохраняется в .test_schema/ и при следующих
+запусках копируется в тестовую базу вместо прогона миграций. Файл
+схемы привязан к хешу миграций, версиям Django и SQLite.
+
+Наборы данных (@dataset) строятся один раз за сессию, каждый снимок
+хранится в отдельной базе SQLite в памяти и подключен к тестовой базе
+через ATTACH. В тесте набор восстанавливается одним INSERT ... SELECT
+на таблицу внутри транзакции теста, так что откат теста убирает его.
+Набор может наследовать другой (parent) и добавлять к нему строки;
+строки родителя он менять не должен. Наборы из разных ветвей можно
+восстанавливать в одном тесте: если строки снимка уже заняты другой
+ветвью, набор строится функцией заново.
+
+Снимки строит django_db_setup из conftest.py проекта при запуске через
+pytest. Без него (manage.py test) наборы строятся заново при каждом
+восстановлении.
+"""
+import copy
+import hashlib
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import setup_databases
+
+SCHEMA_DIR = Path(settings.BASE_DIR) / '.test_schema'
+SNAPSHOT_URI = 'file:snapshot_{name}?mode=memory&cache=shared'
+
+
+@dataclass
+class Dataset:
+    name: str
+    build: Callable[[], dict]
+    parent: str = None
+    # Объекты, которые вернул build, и rowid последних строк таблиц.
+    objects: dict = None
+    rowids: dict = field(default_factory=dict)
+    snapshot: sqlite3.Connection = None
+
+    @property
+    def schema(self):
+        return connection.ops.quote_name(f'snapshot_{self.name}')
+
+
+DATASETS = {}
+# rowid последних строк пустой схемы: contenttypes, права и т.п.
+_base_rowids = {}
+
+
+def dataset(name, parent=None):
+    """Регистрирует функцию, которая строит набор и возвращает словарь."""
+    def register(build):
+        DATASETS[name] = Dataset(name, build, parent)
+        return build
+    return register
+
+
+def schema_key():
+    digest = hashlib.sha256(
+        f'{django.get_version()} {sqlite3.sqlite_version}'.encode()
+    )
+    for path in sorted(Path(settings.BASE_DIR).glob('*/migrations/*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def setup_test_databases(verbosity):
+    """setup_databases, но схема по возможности берётся из файла."""
+    if connection.vendor != 'sqlite':
+        return setup_databases(verbosity, interactive=False)
+    path = SCHEMA_DIR / f'{schema_key()}.sqlite3'
+    test_settings = connection.settings_dict['TEST']
+    migrate = test_settings.get('MIGRATE', True)
+    cached = path.exists()
+    if cached:
+        # Без миграций Django создаст таблицы по моделям, а содержимое
+        # базы затем целиком заменится сохранённой схемой.
+        test_settings['MIGRATE'] = False
+    try:
+        config = setup_databases(verbosity, interactive=False)
+    finally:
+        test_settings['MIGRATE'] = migrate
+    connection.ensure_connection()
+    if cached:
+        source = sqlite3.connect(path)
+        source.backup(connection.connection)
+        source.close()
+        from django.contrib.contenttypes.models import ContentType
+        ContentType.objects.clear_cache()
+    else:
+        # Шарды run_tests_parallel.py пишут файл одновременно.
+        SCHEMA_DIR.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        target = sqlite3.connect(tmp)
+        connection.connection.backup(target)
+        target.close()
+        os.replace(tmp, path)
+    return config
+
+
+def _rowids():
+    rowids = {}
+    with connection.cursor() as cursor:
+        for table in connection.introspection.django_table_names(
+            only_existing=True
+        ):
+            cursor.execute(
+                f'SELECT max(rowid) FROM {connection.ops.quote_name(table)}'
+            )
+            rowids[table] = cursor.fetchone()[0] or 0
+    return rowids
+
+
+def _build(item, base):
+    if item.snapshot is not None:
+        return
+    if item.parent:
+        parent = DATASETS[item.parent]
+        _build(parent, base)
+        parent.snapshot.backup(connection.connection)
+    else:
+        base.backup(connection.connection)
+    item.objects = item.build()
+    item.rowids = _rowids()
+    item.snapshot = sqlite3.connect(
+        SNAPSHOT_URI.format(name=item.name), uri=True,
+        check_same_thread=False,
+    )
+    connection.connection.backup(item.snapshot)
+
+
+def _reserve_ids():
+    """
+    Сдвигает счётчики AUTOINCREMENT за строки всех наборов: объекты,
+    созданные в тесте до восстановления набора, не займут его id.
+    """
+    sequences = {}
+    for item in DATASETS.values():
+        for table, seq in item.snapshot.execute(
+            'SELECT name, seq FROM sqlite_sequence'
+        ):
+            sequences[table] = max(seq, sequences.get(table, 0))
+    with connection.cursor() as cursor:
+        for table, seq in sequences.items():
+            cursor.execute(
+                'DELETE FROM sqlite_sequence WHERE name = %s', [table]
+            )
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                [table, seq],
+            )
+
+
+def build_datasets():
+    """Строит все наборы и подключает их снимки к тестовой базе."""
+    if connection.vendor != 'sqlite' or not DATASETS:
+        return
+    connection.ensure_connection()
+    base = sqlite3.connect(':memory:')
+    connection.connection.backup(base)
+    _base_rowids.update(_rowids())
+    for item in DATASETS.values():
+        _build(item, base)
+    base.backup(connection.connection)
+    base.close()
+    _reserve_ids()
+    for item in DATASETS.values():
+        # ATTACH нельзя выполнить внутри транзакции, поэтому снимки
+        # подключаются сразу все, до первого теста.
+        connection.connection.execute(
+            f'ATTACH DATABASE ? AS {item.schema}',
+            [SNAPSHOT_URI.format(name=item.name)],
+        )
+
+
+def lineage(name):
+    chain = []
+    while name:
+        chain.append(DATASETS[name])
+        name = DATASETS[name].parent
+    return chain[::-1]
+
+
+class Restorer:
+    """Наборы, восстановленные в одном тесте."""
+
+    def __init__(self):
+        self.objects = {}
+        # Наборы, построенные функцией, а не скопированные из снимка:
+        # их id не совпадают со снимком, и потомки строятся так же.
+        self.built = set()
+
+    def restore(self, name):
+        """Копии объектов набора name; набор и его родители в базе."""
+        for item in lineage(name):
+            if item.name in self.objects:
+                continue
+            if (item.snapshot is None or item.parent in self.built
+                    or not self._rows_free(item)):
+                # Снимков нет (база не SQLite), родитель построен заново
+                # или id строк заняты набором другой ветви.
+                self.objects[item.name] = item.build()
+                self.built.add(item.name)
+            else:
+                self._load(item)
+        return copy.deepcopy(self.objects[name])
+
+    @staticmethod
+    def _ranges(item):
+        """Таблицы набора и диапазоны rowid, которые он добавляет."""
+        parent_rowids = (
+            DATASETS[item.parent].rowids if item.parent else _base_rowids
+        )
+        for table, rowid in item.rowids.items():
+            since = parent_rowids.get(table, 0)
+            if rowid > since:
+                yield connection.ops.quote_name(table), since, rowid
+
+    def _rows_free(self, item):
+        with connection.cursor() as cursor:
+            for table, since, rowid in self._ranges(item):
+                cursor.execute(
+                    f'SELECT 1 FROM main.{table} '
+                    f'WHERE rowid > %s AND rowid <= %s LIMIT 1',
+                    [since, rowid],
+                )
+                if cursor.fetchone():
+                    return False
+        return True
+
+    def _load(self, item):
+        with connection.cursor() as cursor:
+            for table, since, _ in self._ranges(item):
+                cursor.execute(
+                    f'INSERT INTO main.{table} '
+                    f'SELECT * FROM {item.schema}.{table} WHERE rowid > %s',
+                    [since],
+                )
+        self.objects[item.name] = item.objects
+        # Строки появились без сигналов моделей, и кеш мог остаться
+        # от прошлого теста с теми же id.
+        for cache in caches.all():
+            cache.clear()
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Наборы PRAGMA для соединений с SQLite. Профиль выбирается
+# настройкой SQLITE_PRAGMA_PROFILE и применяется к каждому новому
+# соединению, см. NewsConfig.ready и notes.sqlite.
+PRAGMA_PROFILES = {
+    # Настройки SQLite по умолчанию: журнал отката, без mmap.
+    'default': {},
+    # WAL: читатели не ждут писателя, а писатели ждут друг друга
+    # до busy_timeout вместо мгновенного «database is locked».
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        # Отрицательное значение — размер в КиБ, а не в страницах.
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+    # То же, но каждая транзакция сразу сбрасывается на диск.
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def get_pragmas(profile=None):
+    """PRAGMA выбранного профиля."""
+    profile = profile or settings.SQLITE_PRAGMA_PROFILE
+    try:
+        return PRAGMA_PROFILES[profile]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'Неизвестный профиль SQLite: {profile!r}. '
+            f'Доступны: {", ".join(PRAGMA_PROFILES)}.'
+        )
+
+
+def apply_pragmas(sqlite_connection, pragmas):
+    # PRAGMA не принимает параметры запроса, значения берутся
+    # только из PRAGMA_PROFILES.
+    for name, value in pragmas.items():
+        sqlite_connection.execute(f'PRAGMA {name} = {value}')
+
+
+def setup_connection(sender, connection, **kwargs):
+    """Обработчик connection_created для соединений с SQLite."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, get_pragmas())
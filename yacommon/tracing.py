@@ -0,0 +1,86 @@
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+# Записи SQL текущего запроса по псевдонимам баз. Переменная контекста
+# переходит в потоки sync_to_async, поэтому под ASGI запросы к базе
+# попадают в отчёт своего запроса, в каком бы потоке они ни шли.
+_recorders = ContextVar('sql_trace_recorders', default=None)
+
+
+@dataclass
+class TracedQuery:
+    sql: str
+    duration: float
+    stack: list
+    alias: str
+
+
+class QueryRecorder:
+    """Записывает запросы к одной базе; вызывается из trace_query."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(TracedQuery(
+                sql,
+                time.perf_counter() - start,
+                self.project_stack(),
+                self.alias,
+            ))
+
+    @staticmethod
+    def project_stack():
+        """Кадры стека из кода проекта (BASE_DIR), без Django и yacommon."""
+        base_dir = str(settings.BASE_DIR)
+        return [
+            f'{frame.filename}:{frame.lineno} in {frame.name}'
+            for frame in traceback.extract_stack()[:-2]
+            if frame.filename.startswith(base_dir)
+            and 'site-packages' not in frame.filename
+        ]
+
+
+@contextmanager
+def record_queries(aliases):
+    """Записывает SQL текущего контекста, отдаёт {псевдоним: запись}."""
+    recorders = {alias: QueryRecorder(alias) for alias in aliases}
+    token = _recorders.set(recorders)
+    try:
+        yield recorders
+    finally:
+        _recorders.reset(token)
+
+
+def trace_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper: передаёт запрос записи текущего запроса."""
+    recorders = _recorders.get()
+    recorder = recorders and recorders.get(context['connection'].alias)
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_trace(connection, **kwargs):
+    """Ставит trace_query на соединение; обработчик connection_created."""
+    if trace_query not in connection.execute_wrappers:
+        # В начало списка: execute_wrapper() снимает обёртки с конца.
+        connection.execute_wrappers.insert(0, trace_query)
+
+
+def trace_thread():
+    """Ставит trace_query на соединения потока, если запрос трассируется."""
+    if _recorders.get() is not None:
+        for connection in connections.all():
+            install_trace(connection)
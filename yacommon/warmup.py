@@ -0,0 +1,61 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def project_templates(engine):
+    """Имена шаблонов проекта, которые видят загрузчики движка."""
+    base_dir = Path(settings.BASE_DIR)
+    names = set()
+    for loader in engine.engine.template_loaders:
+        # Кеширующий загрузчик оборачивает настоящие загрузчики.
+        for source in getattr(loader, 'loaders', [loader]):
+            for directory in map(Path, source.get_dirs()):
+                if base_dir not in directory.parents:
+                    continue
+                names.update(
+                    path.relative_to(directory).as_posix()
+                    for path in directory.rglob('*.html')
+                )
+    return sorted(names)
+
+
+def compile_templates():
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in project_templates(engine):
+            engine.get_template(name)
+            count += 1
+    return count
+
+
+def warm_up():
+    """
+    Подготовка процесса к запросам, пока он их ещё не принимает.
+
+    Компилирует шаблоны проекта (с кеширующим загрузчиком они остаются
+    в памяти) и строит таблицы URLconf. Включается настройкой WARM_UP.
+
+    Соединения с базами здесь не открываются: они свои у каждого потока,
+    и потоки запросов ими бы не воспользовались, а открытый файл SQLite
+    при fork() в сервере с --preload перешёл бы во все рабочие процессы.
+    """
+    if not getattr(settings, 'WARM_UP', False):
+        return
+    start = time.perf_counter()
+    templates = compile_templates()
+    # reverse_dict заполняется при первом обращении.
+    get_resolver().reverse_dict
+    logger.info(
+        'Warm-up: %d templates, %.1f ms',
+        templates, (time.perf_counter() - start) * 1000,
+    )